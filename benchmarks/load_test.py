@@ -0,0 +1,405 @@
+"""Concurrent-session load test of ``streamlit_app.py`` with local stand-ins.
+
+Every virtual user is its own Streamlit session, driven headlessly with
+``streamlit.testing.v1.AppTest`` (Streamlit 1.28 or newer). It loops through
+the navbar: Home, Predict (fill in the MRI form and submit), ChatBot (send one
+message) and News. Nothing leaves the machine:
+
+    MySQL        a temporary SQLite database (DATABASE_URL)
+    NewsAPI      a local fixture server with articles and thumbnails (NEWS_API_URL)
+    HuggingChat  the stub chat provider (CHAT_PROVIDER = "stub")
+    MRI model    the NumPy stand-in behind the local inference server, or a real
+                 export with --engine/--model
+
+AppTest cannot upload files, so the MRI uploader is answered with a synthetic
+scan, a different one per submit, so the prediction cache does not hide the
+inference cost.
+
+Concurrency is stepped through ``--levels``. For each level the report gives,
+per page step, the number of requests, the error rate, p50/p95/p99 latency and
+the throughput, and it flags the first level that breaks the error-rate or p95
+budget. The per-stage histograms from ``cognitex.metrics`` are saved with the
+results.
+
+Usage:
+    python -m benchmarks.load_test [--levels 1,2,4,8,16] [--duration 30] [-o benchmarks/results/load.json]
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from benchmarks.prediction_path import BASE_DIR, PERCENTILES, NumpyStandIn, _git_commit, synthetic_scan
+from cognitex.inference import ENGINES
+from cognitex.inference_server import MicroBatcher, start_server
+from cognitex.metrics import summary
+
+APP_PATH = os.path.join(BASE_DIR, "streamlit_app.py")
+LEVELS = (1, 2, 4, 8, 16)
+SCAN_KEY = "_load_test_scan"
+STEPS = ("home", "predict", "predict_submit", "chat", "chat_message", "news")
+
+
+# ✅ Stand-ins
+def start_news_server(articles=20):
+    """Serves a NewsAPI-shaped /v2/everything response and small JPEG thumbnails on a free port."""
+    thumbnail = synthetic_scan(96)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/v2/everything"):
+                base = f"http://127.0.0.1:{self.server.server_port}"
+                body = json.dumps({"status": "ok", "totalResults": articles, "articles": [{
+                    "title": f"Alzheimer's research update {i}",
+                    "description": "Fixture article for load testing.",
+                    "url": f"{base}/articles/{i}",
+                    "urlToImage": f"{base}/images/{i}.jpg",
+                    "author": "Load Test",
+                    "publishedAt": "2024-01-01T00:00:00Z",
+                } for i in range(articles)]}).encode()
+                content_type = "application/json"
+            elif self.path.startswith("/images/"):
+                body, content_type = thumbnail, "image/jpeg"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="news-fixture", daemon=True).start()
+    return server
+
+
+def start_inference_stand_in():
+    """Runs the NumPy stand-in model behind the real inference server on a free port."""
+    batcher = MicroBatcher(NumpyStandIn(), max_batch_size=16, max_wait_ms=5)
+    return start_server(batcher, port=0, engine="numpy-stand-in", version="load-test")
+
+
+def write_secrets(workdir, secrets):
+    """Writes a secrets.toml of plain strings, numbers and booleans."""
+    path = os.path.join(workdir, "secrets.toml")
+    with open(path, "w", encoding="utf-8") as f:
+        for key, value in secrets.items():
+            f.write(f"{key} = {json.dumps(value)}\n")
+    return path
+
+
+class _Upload(io.BytesIO):
+    """Quacks like Streamlit's UploadedFile for the Predict page."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def install_stand_ins(workdir, engine=None, model=None):
+    """Starts the local services and points every session's ``st.secrets`` at them. Returns the servers."""
+    import streamlit as st
+    from streamlit.runtime.secrets import Secrets
+
+    news = start_news_server()
+    secrets = {
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'load_test.db')}",
+        "DATABASE_FALLBACK_URL": f"sqlite:///{os.path.join(workdir, 'load_test.db')}",
+        "PREDICTION_CACHE_PATH": os.path.join(workdir, "prediction_cache.db"),
+        "IMAGE_STORE_DIR": os.path.join(workdir, "image_store"),
+        "NEWS_API": "load-test",
+        "NEWS_API_URL": f"http://127.0.0.1:{news.server_port}/v2/everything",
+        "CHAT_PROVIDER": "stub",
+        "HF_GMAIL": "load-test@example.com",
+        "HF_PASS": "load-test",
+    }
+    servers = [news]
+    if engine:
+        secrets["INFERENCE_ENGINE"] = engine
+        if model:
+            secrets["INFERENCE_MODEL_PATH"] = model
+    else:
+        inference = start_inference_stand_in()
+        secrets["INFERENCE_SERVER_URL"] = f"http://127.0.0.1:{inference.server_port}"
+        servers.append(inference)
+    # One process-wide secrets object; AppTest's per-test secrets swap a global and race between threads
+    st.secrets = Secrets([write_secrets(workdir, secrets)])
+
+    original = st.file_uploader
+
+    def file_uploader(label, *args, **kwargs):
+        value = original(label, *args, **kwargs)
+        scan = st.session_state.get(SCAN_KEY)
+        if value is None and scan is not None and str(label).startswith("Upload MRI Scan"):
+            return _Upload(scan, "load_test.jpg")
+        return value
+
+    st.file_uploader = file_uploader
+    _patch_app_test()
+    return servers
+
+
+def _patch_app_test():
+    """Makes AppTest usable from many threads at once and timed precisely.
+
+    - Each AppTest run installs its own mock ``Runtime._instance`` and clears
+      it when the run ends, which breaks runs still going in other threads.
+      Every lookup goes through ``streamlit.runtime.get_instance``/``exists``,
+      so both point at one shared mock, like the single runtime of a server.
+    - AppTest polls for the end of a run every 100 ms and reads the final
+      client state without waiting for the script thread. Polling every 5 ms
+      and joining the thread removes both the 100 ms floor on every sample and
+      the race that appears under load.
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit.testing.v1 import local_script_runner
+    from streamlit import runtime
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    runtime.get_instance = lambda: shared
+    runtime.exists = lambda: True
+
+    def require_widgets_deltas(runner, timeout=3):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if runner.script_stopped():
+                runner.join()
+                return
+            time.sleep(0.005)
+        runner.request_stop()
+        runner.join()
+        raise RuntimeError(f"AppTest script run timed out after {timeout}s")
+
+    local_script_runner.require_widgets_deltas = require_widgets_deltas
+
+
+# ✅ Virtual Users
+class VirtualUser:
+    """One Streamlit session walking Home -> Predict -> ChatBot -> News."""
+
+    def __init__(self, user_id, timeout=60.0):
+        self.user_id = user_id
+        self.timeout = timeout
+        self.submits = 0
+        self._new_session()
+
+    def _new_session(self):
+        from streamlit.testing.v1 import AppTest
+        self.app = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+        self.started = False
+        self.failed = False
+
+    def _widget(self, widgets, label):
+        return next(widget for widget in widgets if widget.label == label)
+
+    def _problem(self, expect_success=False):
+        if len(self.app.exception):
+            return self.app.exception[0].message
+        if not len(self.app.button):
+            return "page rendered without the navbar"
+        if expect_success and not len(self.app.success):
+            return self.app.error[0].value if len(self.app.error) else "no success message"
+        return None
+
+    def _timed(self, step, action, record, expect_success=False):
+        started = time.perf_counter()
+        try:
+            action()
+            error = self._problem(expect_success)
+        except Exception as err:  # timeouts and missing widgets count as errors too
+            error = f"{type(err).__name__}: {err}"
+        self.failed = self.failed or error is not None
+        record(step, time.perf_counter() - started, error)
+
+    def _navigate(self, key):
+        self.app.button(key=key).click().run()
+
+    def _submit(self):
+        self._widget(self.app.text_input, "Patient Name").input("Load Test")
+        self._widget(self.app.text_input, "Mobile Number").input(f"+1{self.user_id:04d}{self.submits:06d}")
+        self._widget(self.app.button, "Submit & Predict").click().run()
+
+    def flow(self, record):
+        """Runs one pass through every page, calling ``record(step, seconds, error)`` per step.
+
+        After a failed step the user "reloads the browser tab": the next flow starts a fresh session.
+        """
+        if self.failed:
+            self._new_session()
+        if not self.started:
+            self._timed("home", self.app.run, record)
+            self.started = True
+        else:
+            self._timed("home", lambda: self._navigate("home"), record)
+
+        self._timed("predict", lambda: self._navigate("predict"), record)
+        self.submits += 1
+        self.app.session_state[SCAN_KEY] = synthetic_scan(176, seed=self.user_id * 100_000 + self.submits)
+        self._timed("predict_submit", self._submit, record, expect_success=True)
+
+        self._timed("chat", lambda: self._navigate("chatbot"), record)
+        self._timed("chat_message",
+                    lambda: self.app.chat_input[0].set_value("I keep forgetting names lately.").run(), record)
+
+        self._timed("news", lambda: self._navigate("news"), record)
+
+
+# ✅ Load Levels
+def _step_stats(samples, wall):
+    seconds = np.asarray([s for s, _ in samples])
+    errors = [e for _, e in samples if e]
+    result = {f"p{q}_ms": float(np.percentile(seconds, q) * 1000) for q in PERCENTILES}
+    result.update({
+        "requests": len(samples),
+        "errors": len(errors),
+        "error_rate": len(errors) / len(samples),
+        "throughput_per_s": len(samples) / wall,
+        "first_error": errors[0] if errors else None,
+    })
+    return result
+
+
+def run_level(concurrency, duration, timeout):
+    """Runs ``concurrency`` virtual users for ``duration`` seconds and returns per-step statistics."""
+    samples = defaultdict(list)
+    lock = threading.Lock()
+    flows = [0]
+    deadline = time.monotonic() + duration
+
+    def record(step, seconds, error):
+        with lock:
+            samples[step].append((seconds, error))
+
+    def user(user_id):
+        visitor = VirtualUser(user_id, timeout)
+        while True:  # every user completes at least one flow
+            visitor.flow(record)
+            with lock:
+                flows[0] += 1
+            if time.monotonic() >= deadline:
+                return
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(concurrency * 1000 + i,), name=f"user-{i}")
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    steps = {step: _step_stats(samples[step], wall) for step in STEPS if samples[step]}
+    total = sum(len(s) for s in samples.values())
+    errors = sum(result["errors"] for result in steps.values())
+    return {
+        "concurrency": concurrency,
+        "seconds": wall,
+        "flows": flows[0],
+        "flows_per_s": flows[0] / wall,
+        "error_rate": errors / total if total else 0.0,
+        "steps": steps,
+    }
+
+
+def saturation(levels, max_error_rate, p95_budget_ms):
+    """Returns the first level over the error-rate or p95 budget, or None."""
+    for level in levels:
+        worst_p95 = max(result["p95_ms"] for result in level["steps"].values())
+        if level["error_rate"] > max_error_rate or worst_p95 > p95_budget_ms:
+            return level["concurrency"]
+    return None
+
+
+# ✅ Command Line Interface
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit app with concurrent headless sessions.")
+    parser.add_argument("-o", "--output", default=None, help="JSON file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument("--levels", default=",".join(map(str, LEVELS)), help="Comma separated concurrent sessions")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per level")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before one script run counts as failed")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--p95-budget-ms", type=float, default=3000.0)
+    parser.add_argument("--engine", choices=tuple(ENGINES), default=None, help="Use a real model in-process")
+    parser.add_argument("--model", default=None, help="Model path for --engine")
+    args = parser.parse_args(argv)
+
+    try:
+        import streamlit.testing.v1  # AppTest ships with Streamlit 1.28+
+    except ImportError:
+        print("❌ The load test drives sessions with streamlit.testing (Streamlit 1.28 or newer).")
+        return 1
+
+    os.chdir(BASE_DIR)  # the app reads assets and caches relative to the repository root
+    levels = [int(level) for level in args.levels.split(",")]
+    with tempfile.TemporaryDirectory() as workdir:
+        servers = install_stand_ins(workdir, args.engine, args.model)
+        try:
+            print("⏱️ warm-up session (imports, model and database)...")
+            warmup = run_level(1, 0.0, args.timeout)
+            results = []
+            for concurrency in levels:
+                print(f"⏱️ {concurrency} concurrent session(s) for {args.duration:.0f}s...")
+                level = run_level(concurrency, args.duration, args.timeout)
+                results.append(level)
+                worst = max(level["steps"].items(), key=lambda item: item[1]["p95_ms"])
+                print(f"{'✅' if level['error_rate'] <= args.max_error_rate else '❌'} {concurrency:>3} sessions: "
+                      f"{level['flows_per_s']:.2f} flows/s, {level['error_rate']:.1%} errors, "
+                      f"slowest p95 {worst[0]} {worst[1]['p95_ms']:.0f} ms")
+                for step, result in level["steps"].items():
+                    if result["first_error"]:
+                        print(f"   ❌ {step}: {result['errors']} error(s), e.g. {result['first_error']}")
+        finally:
+            for server in servers:
+                server.shutdown()
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "cpu_count": os.cpu_count(),
+        "model": args.engine or "numpy-stand-in",
+        "duration_s": args.duration,
+        "warmup": warmup["steps"],
+        "levels": results,
+        "saturated_at": saturation(results, args.max_error_rate, args.p95_budget_ms),
+        "stages": summary(),
+    }
+    output = args.output or os.path.join(BASE_DIR, "benchmarks", "results", f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'step':<16}" + "".join(f"{c:>10}" for c in levels) + "   (p95 ms)")
+    for step in STEPS:
+        row = [level["steps"].get(step, {}).get("p95_ms") for level in results]
+        print(f"{step:<16}" + "".join(f"{v:>10.0f}" if v is not None else f"{'-':>10}" for v in row))
+    if report["saturated_at"]:
+        print(f"🔺 Over budget from {report['saturated_at']} concurrent sessions "
+              f"(error rate > {args.max_error_rate:.0%} or p95 > {args.p95_budget_ms:.0f} ms).")
+    else:
+        print("✅ Every level stayed within the error-rate and p95 budget.")
+    print(f"✅ Saved {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,318 @@
+"""Offline benchmarks for every stage of the MRI prediction path.
+
+Runs without ``model/my_model.h5``, MySQL or the network. A tiny stand-in
+model with the real input and output shapes replaces the classifier. It is a
+Keras model when TensorFlow is installed, otherwise a NumPy one, and
+``--engine``/``--model`` select a real export instead. A temporary SQLite
+file replaces MySQL, and the scans are synthetic MRI-like images at several
+resolutions.
+
+Per stage it reports latency percentiles, throughput and peak resident memory.
+RSS covers native allocations (PIL decoders, TensorFlow), which tracemalloc cannot
+see. On Linux the peak is reset before each stage, elsewhere it is the process's
+peak so far.
+Model inference is measured at batch sizes 1, 8 and 32. Results are saved as
+JSON, and ``--compare`` prints the p50 change against an earlier run.
+
+Usage:
+    python -m benchmarks.prediction_path [-o benchmarks/results/run.json] [--repeats 50] [--compare OLD.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from PIL import Image
+
+from cognitex.db import connect
+from cognitex.inference import ENGINES, InferenceBackend, KerasBackend, load_backend
+from cognitex.mri import IMAGE_SIZE, CONDITION_LABELS, open_scan, preprocess_image
+from cognitex.reports import render_report
+from cognitex.history import add_visit
+from cognitex.writer import PredictionWriter
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESOLUTIONS = (176, 512, 1024, 2048)
+BATCH_SIZES = (1, 8, 32)
+PERCENTILES = (50, 90, 95, 99)
+
+
+# ✅ Stand-ins
+def synthetic_scan(size, fmt="JPEG", seed=0):
+    """A grayscale axial-slice look-alike: a noisy bright ellipse with darker ventricles."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[-1:1:size * 1j, -1:1:size * 1j]
+    brain = ((x / 0.8) ** 2 + (y / 0.95) ** 2) < 1
+    ventricles = ((x / 0.15) ** 2 + (y / 0.3) ** 2) < 1
+    pixels = brain * 170.0 - ventricles * 110.0 + rng.normal(0, 12, (size, size))
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "L")
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, quality=90) if fmt == "JPEG" else image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+class NumpyStandIn(InferenceBackend):
+    """Pooling plus a dense softmax layer; roughly the cost of a very small CNN head."""
+
+    name = "numpy-stand-in"
+
+    def __init__(self, classes=len(CONDITION_LABELS), pool=8):
+        super().__init__(None)
+        self.pool = pool
+        features = (IMAGE_SIZE[0] // pool) * (IMAGE_SIZE[1] // pool) * 3
+        self.weights = np.random.default_rng(0).normal(0, 0.01, (features, classes)).astype(np.float32)
+
+    def predict(self, batch):
+        n, h, w, c = batch.shape
+        p = self.pool
+        pooled = batch[:, :h - h % p, :w - w % p].reshape(n, h // p, p, w // p, p, c).mean(axis=(2, 4))
+        logits = pooled.reshape(n, -1) @ self.weights
+        logits = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return logits / logits.sum(axis=1, keepdims=True)
+
+
+def keras_stand_in(path):
+    """Saves a tiny Keras CNN with the real model's input/output shapes to ``path``."""
+    import tensorflow as tf
+    model = tf.keras.Sequential([
+        tf.keras.layers.Input((*IMAGE_SIZE, 3)),
+        tf.keras.layers.Conv2D(8, 3, strides=2, activation="relu"),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(len(CONDITION_LABELS), activation="softmax"),
+    ])
+    model.save(path)
+    return path
+
+
+def stand_in_backend(workdir):
+    try:
+        return KerasBackend(keras_stand_in(os.path.join(workdir, "stand_in.h5")))
+    except ImportError:
+        return NumpyStandIn()
+
+
+# ✅ Measurement
+def _proc_status_mb(field):
+    """A memory figure from /proc/self/status in MB, or None off Linux."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")  # resets VmHWM to the current RSS
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB elsewhere
+
+
+def measure(fn, repeats, warmup=3, items=1):
+    """Times ``repeats`` calls of ``fn`` and returns latency percentiles, throughput and peak RSS."""
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(repeats)
+    _reset_peak_rss()
+    rss_before = _proc_status_mb("VmRSS")
+    for i in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - started
+    peak = _peak_rss_mb()
+    result = {f"p{q}_ms": float(np.percentile(samples, q) * 1000) for q in PERCENTILES}
+    result.update({
+        "mean_ms": float(samples.mean() * 1000),
+        "repeats": repeats,
+        "items_per_call": items,
+        "throughput_per_s": float(items * repeats / samples.sum()),
+        "peak_rss_mb": peak,
+        "peak_rss_growth_mb": None if rss_before is None else max(0.0, peak - rss_before),
+    })
+    return result
+
+
+def bench_preprocess(repeats):
+    results = {}
+    for size in RESOLUTIONS:
+        for fmt in ("JPEG", "PNG"):
+            scan = synthetic_scan(size, fmt)
+
+            def run():
+                with open_scan(scan) as image:
+                    preprocess_image(image)
+            results[f"{fmt.lower()}_{size}"] = measure(run, repeats)
+    return results
+
+
+def bench_inference(backend, repeats):
+    results = {}
+    for batch_size in BATCH_SIZES:
+        batch = np.random.default_rng(batch_size).random((batch_size, *IMAGE_SIZE, 3), dtype=np.float32)
+        results[f"batch_{batch_size}"] = measure(lambda: backend.predict(batch), repeats, items=batch_size)
+    return results
+
+
+def bench_insert(workdir, repeats):
+    db = connect(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    counter = iter(range(10 ** 9))
+
+    def row():
+        return ("Bench Patient", 70, "Female", f"+1{next(counter):011d}", "No Dementia")
+
+    try:
+        results = {"direct": measure(lambda: add_visit(db, *row()), repeats)}
+        writer = PredictionWriter(db)
+        try:
+            # Submitting is what the page waits for; the flush is paid once per batch of 50
+            results["write_behind_submit"] = measure(lambda: writer.submit(row()), repeats)
+            results["write_behind_batch_of_50"] = measure(
+                lambda: ([writer.submit(row()) for _ in range(50)], writer.flush()), max(1, repeats // 10), items=50)
+        finally:
+            writer.close()
+    finally:
+        db.close()
+    return results
+
+
+def bench_pdf(repeats):
+    return {condition: measure(lambda: render_report("Bench Patient", 70, "Female", "+10000000000", condition),
+                               repeats)
+            for condition in ("No Dementia", "Mild Dementia")}
+
+
+def bench_page_import(repeats):
+    """Cold import of the Predict page in a fresh interpreter (includes config and the cognitex modules).
+
+    ``st.secrets`` is pointed at a throwaway secrets.toml first, since config.py reads it on import.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        secrets_path = os.path.join(workdir, "secrets.toml")
+        with open(secrets_path, "w", encoding="utf-8") as f:
+            for key, value in {"DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+                               "NEWS_API": "offline", "HF_GMAIL": "offline", "HF_PASS": "offline"}.items():
+                f.write(f"{key} = {json.dumps(value)}\n")
+        code = ("import streamlit as st; from streamlit.runtime.secrets import Secrets; "
+                f"st.secrets = Secrets([{secrets_path!r}]); "
+                "import time; t = time.perf_counter(); import streamlit_pages._predict_alzheimer; "
+                "print(time.perf_counter() - t)")
+        samples = []
+        for _ in range(repeats):
+            proc = subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, capture_output=True, text=True)
+            if proc.returncode != 0:
+                lines = proc.stderr.strip().splitlines()
+                return {"cold": {"error": lines[-1] if lines else "import failed"}}
+            samples.append(float(proc.stdout.strip().splitlines()[-1]))
+    samples = np.asarray(samples)
+    result = {f"p{q}_ms": float(np.percentile(samples, q) * 1000) for q in PERCENTILES}
+    result.update({"mean_ms": float(samples.mean() * 1000), "repeats": repeats})
+    return {"cold": result}
+
+
+# ✅ Reporting
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    """Yields (stage, case, old p50, new p50) for cases present in both runs."""
+    for stage, cases in current["stages"].items():
+        for case, result in cases.items():
+            old = previous.get("stages", {}).get(stage, {}).get(case, {})
+            if "p50_ms" in result and "p50_ms" in old:
+                yield stage, case, old["p50_ms"], result["p50_ms"]
+
+
+def run(backend=None, repeats=50, stages=None):
+    """Runs the selected stages and returns the results document."""
+    stages = stages or ("preprocess", "inference", "insert", "pdf", "page_import")
+    with tempfile.TemporaryDirectory() as workdir:
+        backend = backend or stand_in_backend(workdir)
+        benches = {
+            "preprocess": lambda: bench_preprocess(repeats),
+            "inference": lambda: bench_inference(backend, repeats),
+            "insert": lambda: bench_insert(workdir, repeats),
+            "pdf": lambda: bench_pdf(repeats),
+            "page_import": lambda: bench_page_import(min(repeats, 5)),
+        }
+        results = {}
+        for stage in stages:
+            print(f"⏱️ {stage}...")
+            results[stage] = benches[stage]()
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": backend.name if backend.model_path is None else f"{backend.name}:{os.path.basename(backend.model_path)}",
+        "repeats": repeats,
+        "stages": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the prediction path offline.")
+    parser.add_argument("-o", "--output", default=None, help="JSON file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--stages", default=None, help="Comma separated subset of "
+                                                       "preprocess,inference,insert,pdf,page_import")
+    parser.add_argument("--engine", choices=tuple(ENGINES), default=None, help="Benchmark a real model export")
+    parser.add_argument("--model", default=None, help="Model path for --engine")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare p50 latencies with")
+    args = parser.parse_args(argv)
+
+    backend = load_backend(args.engine, args.model) if args.engine else None
+    report = run(backend, args.repeats, args.stages.split(",") if args.stages else None)
+
+    output = args.output or os.path.join(BASE_DIR, "benchmarks", "results",
+                                         f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for stage, cases in report["stages"].items():
+        for case, result in cases.items():
+            if "error" in result:
+                print(f"❌ {stage}/{case}: {result['error']}")
+                continue
+            line = f"✅ {stage}/{case}: p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms"
+            if "throughput_per_s" in result:
+                line += f", {result['throughput_per_s']:,.0f}/s, peak RSS {result['peak_rss_mb']:.0f} MB"
+            print(line)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        for stage, case, old, new in compare(report, previous):
+            change = (new - old) / old if old else 0.0
+            print(f"{'🔺' if change > 0.1 else '✅'} {stage}/{case}: p50 {old:.2f} -> {new:.2f} ms ({change:+.1%})")
+    print(f"✅ Saved {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
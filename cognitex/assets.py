@@ -0,0 +1,156 @@
+"""Static asset pipeline.
+
+``build`` copies the CSS, images and background video from ``assets/`` into
+``static/``. Streamlit serves that directory at ``app/static/`` when
+``server.enableStaticServing`` is on, but only images get their real content
+type: CSS and video come back as ``text/plain`` with ``nosniff``, which
+browsers refuse. So only images (and the video poster) are referenced by URL
+(``asset_url``). The built CSS and video are read from disk (``asset_path``)
+and sent inline once per session (see ``cognitex.ui.inject_once``). URLs carry
+a ``?v=<content hash>`` query, which makes Tornado send long-lived cache
+headers and changes whenever the file does.
+
+At build time the CSS is minified, PNG/JPG images get WebP variants and, when
+ffmpeg is installed, the video is re-encoded for streaming and a poster frame
+is extracted.
+
+Usage:
+    python -m cognitex.assets build
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+MANIFEST_PATH = os.path.join(STATIC_DIR, "manifest.json")
+STATIC_URL = "app/static"
+
+
+def _digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:12]
+
+
+# ✅ Build Steps
+def _minify_css(source, target):
+    with open(source, encoding="utf-8") as f:
+        css = f.read()
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css).replace(";}", "}")
+    with open(target, "w", encoding="utf-8") as f:
+        f.write(css.strip())
+
+
+def _webp_variant(source, target):
+    from PIL import Image
+    with Image.open(source) as image:
+        image.save(target, "WEBP", quality=80, method=6)
+
+
+def _encode_video(source, target, poster):
+    """Re-encodes the background video (muted, 720p, fast start) and grabs a poster frame."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        print("⚠️ ffmpeg not found, copying the background video as is (no poster).")
+        shutil.copyfile(source, target)
+        return
+    subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-i", source, "-an", "-vf", "scale=-2:'min(720,ih)'",
+                    "-c:v", "libx264", "-crf", "28", "-preset", "slow", "-movflags", "+faststart", target], check=True)
+    subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-i", target, "-frames:v", "1", "-q:v", "4", poster],
+                   check=True)
+
+
+def build(assets_dir=ASSETS_DIR, static_dir=STATIC_DIR):
+    """Builds ``static/`` and its manifest of asset name -> versioned URL path."""
+    manifest = {}
+
+    def publish(name, target):
+        manifest[name] = f"{os.path.relpath(target, static_dir).replace(os.sep, '/')}?v={_digest(target)}"
+
+    for folder in ("css", "images", "videos"):
+        os.makedirs(os.path.join(static_dir, folder), exist_ok=True)
+
+    css = os.path.join(assets_dir, "css", "styles.css")
+    if os.path.exists(css):
+        target = os.path.join(static_dir, "css", "styles.css")
+        _minify_css(css, target)
+        publish("css/styles.css", target)
+
+    images_dir = os.path.join(assets_dir, "images")
+    for name in sorted(os.listdir(images_dir)) if os.path.isdir(images_dir) else []:
+        source = os.path.join(images_dir, name)
+        target = os.path.join(static_dir, "images", name)
+        shutil.copyfile(source, target)
+        publish(f"images/{name}", target)
+        stem, ext = os.path.splitext(name)
+        if ext.lower() in (".png", ".jpg", ".jpeg") and not os.path.exists(os.path.join(images_dir, stem + ".webp")):
+            variant = os.path.join(static_dir, "images", stem + ".webp")
+            _webp_variant(source, variant)
+            publish(f"images/{stem}.webp", variant)
+
+    video = os.path.join(assets_dir, "videos", "background.mp4")
+    if os.path.exists(video):
+        target = os.path.join(static_dir, "videos", "background.mp4")
+        poster = os.path.join(static_dir, "videos", "background.jpg")
+        if os.path.exists(poster):
+            os.remove(poster)
+        _encode_video(video, target, poster)
+        publish("videos/background.mp4", target)
+        if os.path.exists(poster):
+            publish("videos/background.jpg", poster)
+
+    with open(os.path.join(static_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+# ✅ Lookup
+_manifest = None
+
+
+def load_manifest():
+    """Reads the build manifest once per process; empty if ``build`` has not been run."""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH, encoding="utf-8") as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+
+def asset_path(name):
+    """Returns the built file for an asset such as ``css/styles.css``, or None before ``build``."""
+    path = load_manifest().get(name)
+    return os.path.join(STATIC_DIR, path.split("?")[0]) if path else None
+
+
+def asset_url(name):
+    """Returns the cache-busted static URL for an image such as ``images/logo.webp``, or None."""
+    path = load_manifest().get(name)
+    return f"{STATIC_URL}/{path}" if path else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static assets served by Streamlit.")
+    parser.add_argument("command", choices=("build",))
+    parser.parse_args(argv)
+    manifest = build()
+    for name, path in manifest.items():
+        print(f"✅ {name} -> {STATIC_URL}/{path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,227 @@
+"""Batch MRI scoring for a folder or zip archive of scans.
+
+Usage:
+    python -m cognitex.batch_predict SCANS MANIFEST.csv [-o results.csv] [--engine keras] [--batch-size 32] [--no-db]
+
+SCANS is a directory or a .zip of JPG/PNG files. MANIFEST.csv has one row per
+scan with the columns ``filename, name, age, gender, contact``.
+"""
+import argparse
+import csv
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from cognitex.mri import IMAGE_SIZE, SCAN_EXTENSIONS, MAX_SCAN_BYTES, ScanRejected, open_scan, preprocess_into, condition_label
+from cognitex.inference import ENGINES, load_backend
+from cognitex.db import DEFAULT_URL, connect
+from cognitex.history import record_visit
+from cognitex.prediction_cache import model_version
+
+MANIFEST_COLUMNS = ("filename", "name", "age", "gender", "contact")
+RESULT_COLUMNS = MANIFEST_COLUMNS + ("class_index", "condition", "confidence", "error")
+
+
+# ✅ Scan Sources
+class ScanSource:
+    """Reads raw scan bytes by file name from a directory or a zip archive."""
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else None
+        self._lock = threading.Lock()
+        self._names = {}
+        if self._zip is not None:
+            members = [m for m in self._zip.namelist() if not m.endswith("/")]
+        else:
+            members = [os.path.relpath(os.path.join(root, f), path)
+                       for root, _, files in os.walk(path) for f in files]
+        for member in members:
+            if member.lower().endswith(SCAN_EXTENSIONS):
+                self._names.setdefault(os.path.basename(member), member)
+
+    def read(self, filename):
+        member = self._names.get(os.path.basename(filename))
+        if member is None:
+            raise FileNotFoundError(f"Scan '{filename}' not found in {self.path}")
+        if self._zip is not None:
+            size = self._zip.getinfo(member).file_size
+        else:
+            member = os.path.join(self.path, member)
+            size = os.path.getsize(member)
+        if size > MAX_SCAN_BYTES:  # don't even read oversized scans into memory
+            raise ScanRejected(f"Scan is {size / 1e6:.1f} MB, the limit is {MAX_SCAN_BYTES / 1e6:.0f} MB.")
+
+        if self._zip is not None:
+            # ZipFile shares one file handle between readers
+            with self._lock:
+                return self._zip.read(member)
+        with open(member, "rb") as f:
+            return f.read()
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+
+
+def parse_age(value):
+    """A manifest age as an int; spreadsheet exports such as "65.0" are accepted. Raises ValueError otherwise."""
+    age = float(value)
+    if not age.is_integer() or not 0 <= age <= 150:
+        raise ValueError(f"invalid age '{value}'")
+    return int(age)
+
+
+def read_manifest(manifest_path):
+    """Loads the patient manifest CSV as a list of dicts, with valid ages normalized ("65.0" -> "65")."""
+    with open(manifest_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in MANIFEST_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Manifest is missing columns: {', '.join(missing)}")
+        records = [{c: (row[c] or "").strip() for c in MANIFEST_COLUMNS} for row in reader]
+    for record in records:
+        try:
+            record["age"] = str(parse_age(record["age"]))
+        except ValueError:
+            pass  # kept as written; insert_results skips the row
+    return records
+
+
+# ✅ Decoding and Inference
+def _load_scan(source, filename, out):
+    """Decodes one scan straight into its slot of the batch tensor, returning an error or None."""
+    try:
+        with open_scan(source.read(filename)) as image:
+            preprocess_into(image, out)
+        return None
+    except Exception as err:  # one bad scan must not abort the batch
+        out.fill(0.0)
+        return str(err)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def score_scans(source, records, backend, batch_size=32, workers=None):
+    """Scores manifest records against a ScanSource, yielding one result dict per record.
+
+    Two preallocated (batch_size, 176, 176, 3) tensors are used in turn: the
+    thread pool decodes the next batch into one while the backend runs on the
+    other. Short final batches are zero padded so the model always sees the
+    same input shape.
+    """
+    buffers = [np.zeros((batch_size,) + IMAGE_SIZE + (3,), dtype=np.float32) for _ in range(2)]
+    chunks = list(_chunks(records, batch_size))
+
+    def submit(index):
+        batch = buffers[index % 2]
+        batch[len(chunks[index]):] = 0.0
+        return [pool.submit(_load_scan, source, r["filename"], batch[slot])
+                for slot, r in enumerate(chunks[index])]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = submit(0) if chunks else []
+        for index, chunk in enumerate(chunks):
+            errors = [f.result() for f in pending]
+            if index + 1 < len(chunks):
+                pending = submit(index + 1)
+            probabilities = backend.predict(buffers[index % 2])
+
+            for slot, (record, error) in enumerate(zip(chunk, errors)):
+                result = dict(record, class_index="", condition="", confidence="", error=error or "")
+                if error is None:
+                    class_index = int(np.argmax(probabilities[slot]))
+                    result.update(class_index=class_index,
+                                  condition=condition_label(class_index),
+                                  confidence=f"{float(probabilities[slot][class_index]):.4f}")
+                yield result
+
+
+def write_results(results, output_path):
+    """Writes scored records to a CSV results file."""
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def insert_results(db, results, model_version=None):
+    """Records every successfully scored scan as a patient visit, in a single transaction."""
+    inserted = 0
+    with db.cursor() as cursor:
+        for r in results:
+            if r["error"]:
+                continue
+            try:
+                age = parse_age(r["age"])
+            except ValueError as err:
+                print(f"⚠️ Skipped {r['filename']}: {err}")
+                continue
+            try:
+                record_visit(db, cursor, r["name"], age, r["gender"], r["contact"], r["condition"], "batch",
+                             model_version=model_version)
+                inserted += 1
+            except db.integrity_errors as err:  # e.g. a value too long for its column
+                print(f"❌ Error inserting record for {r['filename']}:", err)
+    return inserted
+
+
+def batch_predict(scans_path, manifest_path, output_path="batch_results.csv",
+                  backend=None, db=None, batch_size=32, workers=None):
+    """Scores a folder or zip of MRI scans listed in a manifest.
+
+    Writes every result to ``output_path`` and, when ``db`` is given, records
+    each successfully scored scan as a patient visit. Returns the results.
+    """
+    records = read_manifest(manifest_path)
+    if backend is None:
+        backend = load_backend()
+    source = ScanSource(scans_path)
+    try:
+        results = list(score_scans(source, records, backend, batch_size=batch_size, workers=workers))
+    finally:
+        source.close()
+
+    write_results(results, output_path)
+    if db is not None:
+        inserted = insert_results(db, results, model_version(backend.model_path, backend.name))
+        print(f"✅ Recorded {inserted} visit(s).")
+    return results
+
+
+# ✅ Command Line Interface
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a folder or zip of MRI scans in batches.")
+    parser.add_argument("scans", help="Directory or .zip archive of JPG/PNG scans")
+    parser.add_argument("manifest", help="CSV with filename, name, age, gender, contact columns")
+    parser.add_argument("-o", "--output", default="batch_results.csv", help="Results CSV path")
+    parser.add_argument("--engine", choices=tuple(ENGINES), default="keras", help="Inference engine")
+    parser.add_argument("--model", default=None, help="Model path (default: the engine's exported model)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None, help="Decode threads (default: CPU based)")
+    parser.add_argument("--no-db", action="store_true", help="Only write the results file")
+    parser.add_argument("--db", default=DEFAULT_URL, help="Database URL (mysql://... or sqlite:///...)")
+    args = parser.parse_args(argv)
+
+    db = None if args.no_db else connect(args.db)
+    try:
+        results = batch_predict(args.scans, args.manifest, args.output,
+                                backend=load_backend(args.engine, args.model), db=db,
+                                batch_size=args.batch_size, workers=args.workers)
+    finally:
+        if db is not None:
+            db.close()
+
+    failed = sum(1 for r in results if r["error"])
+    print(f"✅ Scored {len(results) - failed} scan(s), {failed} failed. Results written to {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
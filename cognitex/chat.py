@@ -0,0 +1,139 @@
+import threading
+import time
+
+# ✅ Chat Providers
+# A provider hands out one conversation per Streamlit session, and a
+# conversation streams the reply to each prompt as text chunks. ``context`` is
+# only sent when the upstream conversation is new, e.g. the first message or
+# after a re-login, so it never grows with the history.
+
+
+class ChatError(Exception):
+    """Raised when the chat provider can't produce a reply."""
+
+
+class StubProvider:
+    """Local stand-in LLM that streams a canned reply word by word (for tests and load tests)."""
+
+    def __init__(self, reply="Thanks for sharing. Please consult a healthcare professional for a proper assessment.",
+                 delay=0.0):
+        self.reply = reply
+        self.delay = delay
+
+    def new_conversation(self):
+        return _StubConversation(self)
+
+
+class _StubConversation:
+    def __init__(self, provider):
+        self.provider = provider
+        self.turns = 0
+
+    def stream(self, prompt, context=""):
+        self.last_prompt = (context if self.turns == 0 else "") + prompt
+        self.turns += 1
+        for word in self.provider.reply.split(" "):
+            if self.provider.delay:
+                time.sleep(self.provider.delay)
+            yield word + " "
+
+
+class HuggingChatProvider:
+    """HuggingChat behind a process-wide cache of login cookies.
+
+    Logging in is done once per process and repeated only when the cookies are
+    older than ``cookie_ttl`` seconds or a chat call is rejected.
+    """
+
+    def __init__(self, email, password, cookie_ttl=6 * 3600):
+        self.email = email
+        self.password = password
+        self.cookie_ttl = cookie_ttl
+        self._cookies = None
+        self._logged_in_at = 0.0
+        self._lock = threading.Lock()
+
+    def cookies(self, refresh=False):
+        with self._lock:
+            expired = time.time() - self._logged_in_at > self.cookie_ttl
+            if refresh or expired or self._cookies is None:
+                from hugchat.login import Login
+                try:
+                    self._cookies = Login(self.email, self.password).login().get_dict()
+                except Exception as err:
+                    raise ChatError(f"HuggingChat login failed: {err}") from err
+                self._logged_in_at = time.time()
+            return self._cookies
+
+    def new_chatbot(self, refresh=False):
+        from hugchat import hugchat
+        return hugchat.ChatBot(cookies=self.cookies(refresh))
+
+    def new_conversation(self):
+        return _HuggingChatConversation(self)
+
+
+class _HuggingChatConversation:
+    def __init__(self, provider):
+        self.provider = provider
+        self.chatbot = None
+
+    def _start(self, prompt, context, refresh=False):
+        """Sends the prompt and pulls the first chunk; hugchat's Message is lazy, so errors surface there."""
+        fresh = self.chatbot is None
+        if fresh:
+            self.chatbot = self.provider.new_chatbot(refresh)
+        tokens = _tokens(self.chatbot.chat(context + prompt if fresh else prompt))
+        return tokens, next(tokens, None)
+
+    def stream(self, prompt, context=""):
+        try:
+            tokens, first = self._start(prompt, context)
+        except Exception:
+            # Most likely expired cookies: log in again and start a fresh conversation once
+            self.chatbot = None
+            try:
+                tokens, first = self._start(prompt, context, refresh=True)
+            except ChatError:
+                raise
+            except Exception as err:
+                raise ChatError(f"HuggingChat request failed: {err}") from err
+        if first is not None:
+            yield first
+        try:
+            yield from tokens
+        except Exception as err:
+            self.chatbot = None  # the upstream conversation is in an unknown state; the next prompt starts afresh
+            raise ChatError(f"HuggingChat reply was interrupted: {err}") from err
+
+
+def _tokens(message):
+    """Yields streamed tokens from a hugchat Message, or its full text if it can't stream."""
+    if isinstance(message, (str, bytes)):  # a finished reply; iterating it would yield single characters
+        yield message.decode() if isinstance(message, bytes) else message
+        return
+    try:
+        chunks = iter(message)
+    except TypeError:
+        yield str(message)
+        return
+    streamed = False
+    for chunk in chunks:
+        if isinstance(chunk, dict):
+            token = chunk.get("token") if chunk.get("type", "stream") == "stream" else None
+        else:
+            token = str(chunk)
+        if token:
+            streamed = True
+            yield token
+    if not streamed:
+        yield str(message)
+
+
+def make_provider(name, email=None, password=None):
+    """Builds the configured provider: "huggingchat" (default) or "stub"."""
+    if name == "stub":
+        return StubProvider()
+    if name == "huggingchat":
+        return HuggingChatProvider(email, password)
+    raise ValueError(f"Unknown chat provider '{name}'. Choose 'huggingchat' or 'stub'.")
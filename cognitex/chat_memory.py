@@ -0,0 +1,80 @@
+import re
+from collections import deque
+
+# ✅ Conversation Memory
+# Each session keeps a bounded window of recent turns under a token budget.
+# Turns that fall out of the window are folded into a short extractive
+# summary, so the context sent upstream stays roughly constant in size.
+
+CHARS_PER_TOKEN = 4
+SUMMARY_SNIPPET_CHARS = 160
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token), good enough for budgeting."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _first_sentence(text, limit=SUMMARY_SNIPPET_CHARS):
+    text = " ".join(text.split())
+    sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    return sentence if len(sentence) <= limit else sentence[:limit - 1].rstrip() + "…"
+
+
+class ConversationMemory:
+    """Per-session chat history: a token-bounded window of turns plus a summary of older ones."""
+
+    def __init__(self, base_prompt="", token_budget=1500, max_turns=20, summary_budget=300):
+        self.base_prompt = base_prompt
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.summary_budget = summary_budget
+        self.turns = deque()  # (role, content, tokens)
+        self.summary_lines = deque()
+        self.summarized_turns = 0
+        self._window_tokens = 0
+        self._summary_tokens = 0
+
+    def add(self, role, content):
+        tokens = estimate_tokens(content)
+        self.turns.append((role, content, tokens))
+        self._window_tokens += tokens
+        self._compact()
+
+    def _compact(self):
+        # Always keep the latest exchange, however long it is
+        while len(self.turns) > 2 and (len(self.turns) > self.max_turns or self._window_tokens > self.token_budget):
+            role, content, tokens = self.turns.popleft()
+            self._window_tokens -= tokens
+            self.summarized_turns += 1
+            line = f"{'User' if role == 'user' else 'Assistant'}: {_first_sentence(content)}"
+            self.summary_lines.append(line)
+            self._summary_tokens += estimate_tokens(line)
+            while len(self.summary_lines) > 1 and self._summary_tokens > self.summary_budget:
+                self._summary_tokens -= estimate_tokens(self.summary_lines.popleft())
+
+    @property
+    def summary(self):
+        return "\n".join(self.summary_lines)
+
+    def messages(self, limit=None):
+        """Returns the most recent ``limit`` turns as chat message dicts."""
+        turns = list(self.turns)[-limit:] if limit else self.turns
+        return [{"role": role, "content": content} for role, content, _ in turns]
+
+    def context(self):
+        """Text that primes a fresh upstream conversation: base prompt, summary and recent turns.
+
+        The latest turn is left out because it is the prompt being sent.
+        """
+        parts = [self.base_prompt] if self.base_prompt else []
+        if self.summary_lines:
+            parts.append("Summary of the earlier conversation:\n" + self.summary)
+        recent = list(self.turns)[:-1]
+        if recent:
+            parts.append("Recent messages:\n" + "\n".join(
+                f"{'User' if role == 'user' else 'Assistant'}: {content}" for role, content, _ in recent))
+        return "\n\n".join(parts) + "\n\n" if parts else ""
+
+    def token_count(self):
+        return self._window_tokens + self._summary_tokens
@@ -0,0 +1,252 @@
+"""Streaming export of the ``predicts`` view to CSV or Parquet.
+
+Rows are read in keyset pages (``id > last ORDER BY id LIMIT chunk_size``),
+each its own short query on the primary key. The export holds one page in
+memory whatever the table size, and does not pin a pooled connection (or a
+read snapshot) for the whole run. Each page is appended to the output as it
+arrives: CSV rows through ``csv.writer``, Parquet as one row group per page.
+The file is written under a temporary name and renamed into place when
+complete.
+
+Incremental exports start after a visit id (``--since-id``), from a
+timestamp (``--since``) or from where the last run stopped (``--state``,
+a small JSON file holding the last exported id).
+
+Ids are handed out when a row is inserted but only become visible when its
+transaction commits, so with the write-behind writer a lower id can appear
+after a higher one was exported. An export therefore stops at a committed
+watermark: the newest visit created at least ``--settle-seconds`` (default 60)
+ago. Every lower id was inserted earlier still, so its transaction has
+finished, and the next run's ``--since-id`` never passes an in-flight row.
+Visits younger than that are left for the next run.
+
+Usage:
+    python -m cognitex.export predicts.parquet [--db URL] [--format csv|parquet]
+        [--since-id N | --since "2026-10-01 00:00:00"] [--state exports/predicts.state.json]
+        [--with-images] [--with-model] [--chunk-size 10000] [--settle-seconds 60]
+"""
+import argparse
+import csv
+import json
+import os
+from collections import namedtuple
+from datetime import datetime
+
+from cognitex.db import DEFAULT_URL, DatabaseError, connect
+
+FORMATS = ("csv", "parquet")
+CHUNK_SIZE = 10000
+SETTLE_SECONDS = 60  # longer than any write transaction; see the module docstring
+COLUMNS = ("id", "patient_id", "name", "age", "gender", "contact", "diagnosis_condition", "source", "created_at")
+IMAGE_COLUMNS = ("image_hash", "image_format", "image_width", "image_height")
+MODEL_COLUMNS = ("model_version",)
+_SELECT = {
+    "image_hash": "p.image_hash",
+    "image_format": "s.format",
+    "image_width": "s.width",
+    "image_height": "s.height",
+}
+
+ExportResult = namedtuple("ExportResult", "path rows last_id")
+
+
+def export_columns(with_images=False, with_model=False):
+    return COLUMNS + (IMAGE_COLUMNS if with_images else ()) + (MODEL_COLUMNS if with_model else ())
+
+
+# created_at is written by the database clock, so the settle cutoff is computed there too
+_SETTLED = {
+    "sqlite": "datetime('now', '-' || %s || ' seconds')",
+    "mysql": "NOW() - INTERVAL %s SECOND",
+}
+
+
+def _page_query(columns, since):
+    select = ", ".join(_SELECT.get(column, f"p.{column}") for column in columns)
+    join = " LEFT JOIN scans s ON s.hash = p.image_hash" if "image_format" in columns else ""
+    query = f"SELECT {select} FROM predicts p{join} WHERE p.id > %s AND p.id <= %s"
+    if since is not None:
+        query += " AND p.created_at >= %s"
+    return query + " ORDER BY p.id LIMIT %s"
+
+
+def _timestamp(value):
+    """SQLite returns timestamps as text, MySQL as datetime."""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+# ✅ Output Formats
+class _CsvExport:
+    def __init__(self, path, columns):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+class _ParquetExport:
+    """One Parquet row group per page, with a fixed schema so every page has the same column types."""
+
+    def __init__(self, path, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        types = {"id": pa.int64(), "patient_id": pa.int64(), "age": pa.int32(), "created_at": pa.timestamp("s"),
+                 "image_width": pa.int32(), "image_height": pa.int32()}
+        self._schema = pa.schema([(column, types.get(column, pa.string())) for column in columns])
+        self._timestamps = [i for i, column in enumerate(columns) if column == "created_at"]
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        values = [list(column) for column in zip(*rows)]
+        for i in self._timestamps:
+            values[i] = [_timestamp(value) for value in values[i]]
+        arrays = [self._pa.array(column, type=field.type) for column, field in zip(values, self._schema)]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+OUTPUTS = {"csv": _CsvExport, "parquet": _ParquetExport}
+
+
+def output_format(path, fmt=None):
+    """The requested format, or the one implied by the file extension (CSV by default)."""
+    if fmt:
+        return fmt
+    return "parquet" if str(path).lower().endswith((".parquet", ".pq")) else "csv"
+
+
+# ✅ Export
+def committed_watermark(db, settle_seconds=SETTLE_SECONDS):
+    """The id of the newest visit created at least ``settle_seconds`` ago (on the created_at index), or 0."""
+    row = db.fetchone(f"SELECT id FROM visits WHERE created_at <= {_SETTLED[db.dialect]} "
+                      "ORDER BY created_at DESC, id DESC LIMIT 1", (int(settle_seconds),))
+    return 0 if row is None else row[0]
+
+
+def _id_before(db, since):
+    """The id just before the first visit created at or after ``since`` (found on the created_at index)."""
+    row = db.fetchone("SELECT MIN(id) FROM visits WHERE created_at >= %s", (since,))
+    return None if row[0] is None else row[0] - 1
+
+
+def export_predictions(db, path, fmt=None, since_id=None, since=None, with_images=False, with_model=False,
+                       chunk_size=CHUNK_SIZE, progress=None, settle_seconds=SETTLE_SECONDS):
+    """Streams the ``predicts`` rows after ``since_id`` and/or created at or after ``since`` to ``path``.
+
+    Rows past the committed watermark (see ``committed_watermark``) are left for the next export.
+    ``progress(rows, last_id)`` is called after every page. Returns an ExportResult whose
+    ``last_id`` is the ``since_id`` of the next incremental export.
+    """
+    fmt = output_format(path, fmt)
+    columns = export_columns(with_images, with_model)
+    watermark = committed_watermark(db, settle_seconds)
+    last_id = since_id or 0
+    if since is not None:
+        start = _id_before(db, since)
+        if start is None:  # nothing was created since then; the next export continues after the watermark
+            start = watermark
+        last_id = max(last_id, min(start, watermark))
+    done = last_id >= watermark
+    query = _page_query(columns, since)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    output = OUTPUTS[fmt](tmp_path, columns)
+    rows = 0
+    try:
+        while not done:
+            params = [last_id, watermark] + ([since] if since is not None else []) + [chunk_size]
+            page = db.fetchall(query, params)
+            if not page:
+                break
+            output.write(page)
+            rows += len(page)
+            last_id = page[-1][0]
+            if progress is not None:
+                progress(rows, last_id)
+            done = len(page) < chunk_size
+    except BaseException:
+        output.close()
+        os.remove(tmp_path)
+        raise
+    output.close()
+    os.replace(tmp_path, path)
+    return ExportResult(path, rows, last_id)
+
+
+# ✅ Incremental State
+def load_state(path):
+    """The last exported id recorded in ``path``, or None before the first export."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["last_id"]
+    except FileNotFoundError:
+        return None
+
+
+def save_state(path, result):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"last_id": result.last_id, "rows": result.rows, "path": result.path,
+                   "exported_at": datetime.now().isoformat(timespec="seconds")}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ✅ Command Line Interface
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the predictions table to CSV or Parquet.")
+    parser.add_argument("output", help="Output file (.csv or .parquet)")
+    parser.add_argument("--db", default=DEFAULT_URL, help="Database URL")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="Default: from the output extension")
+    since = parser.add_mutually_exclusive_group()
+    since.add_argument("--since-id", type=int, default=None, help="Only visits with a larger id")
+    since.add_argument("--since", default=None, help='Only visits created at or after "YYYY-MM-DD HH:MM:SS"')
+    parser.add_argument("--state", default=None,
+                        help="JSON file remembering the last exported id; later runs continue from it")
+    parser.add_argument("--with-images", action="store_true", help="Add scan hash, format and size")
+    parser.add_argument("--with-model", action="store_true", help="Add the model version behind each prediction")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows read per query")
+    parser.add_argument("--settle-seconds", type=int, default=SETTLE_SECONDS,
+                        help="Leave visits younger than this for the next export (0 on a quiescent database)")
+    args = parser.parse_args(argv)
+
+    since_id = args.since_id
+    if since_id is None and args.since is None and args.state:
+        since_id = load_state(args.state)
+    try:
+        db = connect(args.db)
+    except DatabaseError as err:
+        print(f"❌ {err}")
+        return 1
+    try:
+        result = export_predictions(db, args.output, args.format, since_id, args.since,
+                                    args.with_images, args.with_model, args.chunk_size,
+                                    settle_seconds=args.settle_seconds)
+    except DatabaseError as err:
+        print(f"❌ Export failed: {err}")
+        return 1
+    finally:
+        db.close()
+    if args.state:
+        save_state(args.state, result)
+    print(f"✅ Exported {result.rows} row(s) to {result.path}; "
+          f"continue with --since-id {result.last_id}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
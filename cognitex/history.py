@@ -0,0 +1,115 @@
+"""Patient history: upserted patients, their visits and keyset-paginated lookups.
+
+Every query here is a range scan on one of the indexes in ``cognitex.db``, and
+pages continue from the last row seen (``after``/``before`` cursors) instead
+of using OFFSET. So the 500th page costs the same as the first, however many
+records there are.
+"""
+import re
+
+from cognitex.image_store import record_scan
+
+PAGE_SIZE = 20
+VISITS_PAGE_SIZE = 50
+
+# Upsert a patient by contact; on MySQL LAST_INSERT_ID(id) makes lastrowid the existing row's id
+UPSERT_PATIENT = {
+    "mysql": ("INSERT INTO patients (name, search_name, gender, contact) VALUES (%s, %s, %s, %s) "
+              "ON DUPLICATE KEY UPDATE name = VALUES(name), search_name = VALUES(search_name), "
+              "gender = VALUES(gender), last_visit_at = CURRENT_TIMESTAMP, id = LAST_INSERT_ID(id)"),
+    "sqlite": ("INSERT INTO patients (name, search_name, gender, contact) VALUES (%s, %s, %s, %s) "
+               "ON CONFLICT (contact) DO UPDATE SET name = excluded.name, search_name = excluded.search_name, "
+               "gender = excluded.gender, last_visit_at = CURRENT_TIMESTAMP"),
+}
+INSERT_VISIT = ("INSERT INTO visits (patient_id, age, diagnosis_condition, source, image_hash, model_version) "
+                "VALUES (%s, %s, %s, %s, %s, %s)")
+PATIENT_COLUMNS = ("id", "name", "gender", "contact", "created_at", "last_visit_at")
+VISIT_COLUMNS = ("id", "age", "diagnosis_condition", "source", "created_at", "image_hash", "model_version")
+
+_PHONE = re.compile(r"^\+?\d+$")
+
+
+def search_key(name):
+    return " ".join(str(name).split()).lower()
+
+
+# ✅ Writes
+def record_visit(db, cursor, name, age, gender, contact, condition, source="mri", scan=None, model_version=None):
+    """Upserts the patient and adds a visit on ``cursor`` (inside the caller's transaction). Returns the visit id.
+
+    ``scan`` is the ScanInfo returned by ``ImageStore.put`` for the scored image, if it was stored, and
+    ``model_version`` the version of the model that made the prediction.
+    """
+    cursor.execute(db.sql(UPSERT_PATIENT[db.dialect]), (name, search_key(name), gender, str(contact)))
+    if db.dialect == "mysql":
+        patient_id = cursor.lastrowid
+    else:
+        cursor.execute(db.sql("SELECT id FROM patients WHERE contact = %s"), (str(contact),))
+        patient_id = cursor.fetchone()[0]
+    if scan is not None:
+        record_scan(db, cursor, scan)
+    cursor.execute(db.sql(INSERT_VISIT), (patient_id, int(age), condition, source, scan and scan.hash, model_version))
+    return cursor.lastrowid
+
+
+def add_visit(db, name, age, gender, contact, condition, source="mri", scan=None, model_version=None):
+    """Records one visit in its own transaction."""
+    with db.cursor() as cursor:
+        return record_visit(db, cursor, name, age, gender, contact, condition, source, scan, model_version)
+
+
+# ✅ Keyset-paginated Reads
+def _prefix_range(prefix):
+    """Returns (low, high) so that ``low <= value < high`` matches every value starting with ``prefix``."""
+    if not prefix:
+        return "", None
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def search_patients(db, text="", after=None, limit=PAGE_SIZE):
+    """Returns (patients, next_cursor) for patients whose contact or name starts with ``text``.
+
+    Digits (optionally with a leading +) search contacts, anything else searches
+    names case-insensitively. Pass the returned cursor as ``after`` for the next
+    page; it is None on the last page.
+    """
+    text = text.strip()
+    by_contact = bool(_PHONE.match(text))
+    column = "contact" if by_contact else "search_name"
+    low, high = _prefix_range(text if by_contact else search_key(text))
+
+    query = f"SELECT {', '.join(PATIENT_COLUMNS)}, {column} FROM patients WHERE {column} >= %s"
+    params = [low]
+    if high is not None:
+        query += f" AND {column} < %s"
+        params.append(high)
+    if after is not None:
+        key, last_id = after
+        query += f" AND ({column} > %s OR ({column} = %s AND id > %s))"
+        params += [key, key, last_id]
+    query += f" ORDER BY {column}, id LIMIT %s"
+    params.append(limit + 1)  # one extra row tells us whether there is a next page
+
+    rows = db.fetchall(query, params)
+    patients = [dict(zip(PATIENT_COLUMNS, row[:-1])) for row in rows[:limit]]
+    next_cursor = (rows[limit - 1][-1], rows[limit - 1][0]) if len(rows) > limit else None
+    return patients, next_cursor
+
+
+def get_patient(db, contact):
+    row = db.fetchone(f"SELECT {', '.join(PATIENT_COLUMNS)} FROM patients WHERE contact = %s", (str(contact),))
+    return dict(zip(PATIENT_COLUMNS, row)) if row else None
+
+
+def patient_visits(db, patient_id, before=None, limit=VISITS_PAGE_SIZE):
+    """Returns (visits, next_cursor) newest first; pass the cursor as ``before`` for older visits."""
+    query = f"SELECT {', '.join(VISIT_COLUMNS)} FROM visits WHERE patient_id = %s"
+    params = [patient_id]
+    if before is not None:
+        query += " AND id < %s"
+        params.append(before)
+    query += " ORDER BY id DESC LIMIT %s"
+    params.append(limit + 1)
+    rows = db.fetchall(query, params)
+    visits = [dict(zip(VISIT_COLUMNS, row)) for row in rows[:limit]]
+    return visits, (visits[-1]["id"] if len(rows) > limit else None)
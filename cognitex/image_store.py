@@ -0,0 +1,264 @@
+"""Content-addressed on-disk store for uploaded MRI scans.
+
+A scan is saved once, under the SHA-256 of its bytes
+(``image_store/ab/cd/abcd....png``), so repeat uploads of the same file cost
+nothing. A JPEG thumbnail is generated when a new scan is stored, and the
+database only keeps the hash and metadata (``scans`` table,
+``visits.image_hash``). Scans are read back through read-only memory maps, so
+re-scoring or auditing thousands of them never copies whole files onto the
+Python heap.
+
+Usage:
+    python -m cognitex.image_store import-legacy [--db URL]   move old image blobs/paths into the store
+    python -m cognitex.image_store rescore -o rescore.csv [--db URL] [--engine keras]
+    python -m cognitex.image_store verify                      re-hash every stored scan
+"""
+import argparse
+import csv
+import hashlib
+import mmap
+import os
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+
+from cognitex.db import DEFAULT_URL, connect
+from cognitex.mri import IMAGE_SIZE, ScanRejected, condition_label, open_scan, preprocess_into
+
+DEFAULT_ROOT = "image_store"
+LEGACY_PAGE_SIZE = 50  # legacy rows (and image blobs) read per query by import_legacy
+THUMBNAIL_SIZE = (256, 256)
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png"}
+
+ScanInfo = namedtuple("ScanInfo", "hash format width height bytes")
+
+INSERT_SCAN = {
+    "mysql": "INSERT IGNORE INTO scans (hash, format, width, height, bytes) VALUES (%s, %s, %s, %s, %s)",
+    "sqlite": "INSERT OR IGNORE INTO scans (hash, format, width, height, bytes) VALUES (%s, %s, %s, %s, %s)",
+}
+
+
+class ImageStore:
+    """Deduplicating scan files plus thumbnails, addressed by SHA-256."""
+
+    def __init__(self, root=DEFAULT_ROOT, thumbnail_size=THUMBNAIL_SIZE):
+        self.root = root
+        self.thumbnail_size = thumbnail_size
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, digest, kind="scans"):
+        return os.path.join(self.root, kind, digest[:2], digest[2:4])
+
+    def path(self, digest):
+        """Path of a stored scan, whatever its format, or None."""
+        directory = self._dir(digest)
+        for ext in EXTENSIONS.values():
+            candidate = os.path.join(directory, digest + ext)
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def thumbnail_path(self, digest):
+        path = os.path.join(self._dir(digest, "thumbnails"), digest + ".jpg")
+        return path if os.path.exists(path) else None
+
+    def put(self, data):
+        """Stores scan bytes (validated with ``open_scan``) unless already present; returns its ScanInfo."""
+        digest = hashlib.sha256(data).hexdigest()
+        with open_scan(data) as image:
+            info = ScanInfo(digest, image.format, image.width, image.height, len(data))
+            path = os.path.join(self._dir(digest), digest + EXTENSIONS[image.format])
+            if os.path.exists(path):
+                return info  # deduplicated: same bytes, same file
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._write_thumbnail(image, digest)
+        return info
+
+    def _write_thumbnail(self, image, digest):
+        image.draft("RGB", self.thumbnail_size)
+        thumbnail = image.convert("RGB")
+        thumbnail.thumbnail(self.thumbnail_size)
+        path = os.path.join(self._dir(digest, "thumbnails"), digest + ".jpg")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        thumbnail.save(tmp_path, "JPEG", quality=80, optimize=True)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def mapped(self, digest):
+        """Yields a read-only memory map of a stored scan."""
+        path = self.path(digest)
+        if path is None:
+            raise FileNotFoundError(f"Scan {digest} is not in {self.root}")
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+    def iter_hashes(self):
+        scans = os.path.join(self.root, "scans")
+        for directory, _, files in os.walk(scans):
+            for name in files:
+                stem, ext = os.path.splitext(name)
+                if ext in EXTENSIONS.values():
+                    yield stem
+
+    def verify(self, digest):
+        """Re-hashes a stored scan through its memory map."""
+        with self.mapped(digest) as mapped:
+            return hashlib.sha256(mapped).hexdigest() == digest
+
+
+def record_scan(db, cursor, info):
+    """Stores a scan's metadata row (once per hash) inside the caller's transaction."""
+    cursor.execute(db.sql(INSERT_SCAN[db.dialect]), tuple(info))
+
+
+# ✅ Legacy Images
+def import_legacy(db, store):
+    """Moves images from pre-store tables into the store and links them to the migrated visits.
+
+    ``predicts_legacy.image`` held blobs (MySQL) and ``patients_legacy.image_path``
+    held file paths (the old SQLite table). Each is matched to the first visit of
+    the same contact and condition that has no image yet.
+    """
+    sources = []
+    tables = {row[0] for row in db.fetchall(
+        "SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE()"
+        if db.dialect == "mysql" else "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "predicts_legacy" in tables:
+        sources.append(("SELECT id, contact, diagnosis_condition, image FROM predicts_legacy "
+                        "WHERE image IS NOT NULL AND id > %s ORDER BY id LIMIT %s", lambda value: bytes(value)))
+    if "patients_legacy" in tables:
+        sources.append(("SELECT id, contact, `condition`, image_path FROM patients_legacy "
+                        "WHERE image_path IS NOT NULL AND id > %s ORDER BY id LIMIT %s", _read_file))
+
+    linked = skipped = 0
+    for query, load in sources:
+        for _, contact, condition, value in _legacy_pages(db, query, LEGACY_PAGE_SIZE):
+            data = load(value)
+            if not data:
+                skipped += 1
+                continue
+            try:
+                info = store.put(data)
+            except ScanRejected as err:
+                print(f"⚠️ Skipping a legacy image of {contact}: {err}")
+                skipped += 1
+                continue
+            with db.cursor() as cursor:
+                record_scan(db, cursor, info)
+                cursor.execute(db.sql(
+                    "SELECT v.id FROM visits v JOIN patients p ON p.id = v.patient_id "
+                    "WHERE p.contact = %s AND v.diagnosis_condition = %s AND v.image_hash IS NULL "
+                    "ORDER BY v.id LIMIT 1"), (contact, condition))
+                row = cursor.fetchone()
+                if row is None:
+                    skipped += 1
+                    continue
+                cursor.execute(db.sql("UPDATE visits SET image_hash = %s WHERE id = %s"), (info.hash, row[0]))
+                linked += 1
+    return linked, skipped
+
+
+def _legacy_pages(db, query, page_size):
+    """Yields legacy rows a keyset page at a time, so only ``page_size`` image blobs are in memory at once.
+
+    Each page is its own short query, so no cursor stays open while the visits are updated.
+    """
+    last_id = 0
+    while True:
+        page = db.fetchall(query, (last_id, page_size))
+        yield from page
+        if len(page) < page_size:
+            return
+        last_id = page[-1][0]
+
+
+def _read_file(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# ✅ Re-scoring
+def rescore(db, store, backend, output_path, batch_size=32):
+    """Runs every stored visit scan through ``backend`` again and writes old vs new conditions to a csv."""
+    query = "SELECT id, diagnosis_condition, image_hash FROM visits WHERE image_hash IS NOT NULL ORDER BY id"
+    batch = np.zeros((batch_size,) + IMAGE_SIZE + (3,), dtype=np.float32)
+    pending = []
+    counts = {"rescored": 0, "changed": 0}
+
+    def flush(writer):
+        if not pending:
+            return
+        classes = backend.predict_classes(batch[:len(pending)])
+        for (visit_id, old, digest), index in zip(pending, classes):
+            new = condition_label(int(index))
+            writer.writerow((visit_id, digest, old, new, old != new))
+            counts["rescored"] += 1
+            counts["changed"] += old != new
+        pending.clear()
+
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("visit_id", "image_hash", "stored_condition", "new_condition", "changed"))
+        for visit_id, old, digest in db.iterate(query):
+            try:
+                with store.mapped(digest) as mapped, open_scan(mapped) as image:
+                    preprocess_into(image, batch[len(pending)])
+            except (FileNotFoundError, ScanRejected) as err:
+                print(f"⚠️ Visit {visit_id}: {err}")
+                continue
+            pending.append((visit_id, old, digest))
+            if len(pending) == batch_size:
+                flush(writer)
+        flush(writer)
+    return counts
+
+
+# ✅ Command Line Interface
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the content-addressed MRI scan store.")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="Store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    legacy = commands.add_parser("import-legacy", help="Move old image blobs and paths into the store")
+    legacy.add_argument("--db", default=DEFAULT_URL, help="Database URL")
+    again = commands.add_parser("rescore", help="Score every stored visit scan with the current model")
+    again.add_argument("-o", "--output", default="rescore.csv")
+    again.add_argument("--db", default=DEFAULT_URL, help="Database URL")
+    again.add_argument("--engine", default="keras")
+    again.add_argument("--model", default=None)
+    commands.add_parser("verify", help="Check every stored scan still matches its hash")
+    args = parser.parse_args(argv)
+
+    store = ImageStore(args.root)
+    if args.command == "verify":
+        bad = [digest for digest in store.iter_hashes() if not store.verify(digest)]
+        for digest in bad:
+            print(f"❌ {digest} is corrupt")
+        print(f"{'❌' if bad else '✅'} Verified the store, {len(bad)} corrupt scan(s).")
+        return 1 if bad else 0
+
+    db = connect(args.db)
+    try:
+        if args.command == "import-legacy":
+            linked, skipped = import_legacy(db, store)
+            print(f"✅ Linked {linked} legacy image(s) to visits ({skipped} skipped).")
+        else:
+            from cognitex.inference import load_backend
+            counts = rescore(db, store, load_backend(args.engine, args.model), args.output)
+            print(f"✅ Rescored {counts['rescored']} scan(s), {counts['changed']} changed -> {args.output}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,257 @@
+"""Pluggable CPU inference backends for the MRI classifier.
+
+Engines:
+    keras   the original ``model/my_model.h5`` through TensorFlow/Keras
+    tflite  a TFLite export (optionally float16 or int8 quantized), run with
+            ``tflite_runtime`` when installed, falling back to ``tf.lite``
+    onnx    an ONNX export run with ONNX Runtime
+
+Usage:
+    python -m cognitex.inference export tflite [--quantize float16|int8|dynamic] [--reference-dir DIR]
+    python -m cognitex.inference export onnx
+    python -m cognitex.inference parity ENGINE --reference-dir DIR
+"""
+import argparse
+import os
+import threading
+
+import numpy as np
+from PIL import Image
+
+from cognitex.mri import MODEL_PATH, IMAGE_SIZE, SCAN_EXTENSIONS, load_mri_model, preprocess_into
+
+DEFAULT_MODEL_PATHS = {
+    "keras": MODEL_PATH,
+    "tflite": "model/my_model.tflite",
+    "onnx": "model/my_model.onnx",
+}
+QUANTIZATION_MODES = ("float16", "int8", "dynamic")
+
+
+# ✅ Backends
+class InferenceBackend:
+    """Common interface: ``predict`` maps a float32 (N, 176, 176, 3) batch to class probabilities."""
+
+    name = None
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+
+    def predict(self, batch):
+        raise NotImplementedError
+
+    def predict_classes(self, batch):
+        return np.argmax(self.predict(batch), axis=1)
+
+
+class KerasBackend(InferenceBackend):
+    name = "keras"
+
+    def __init__(self, model_path, num_threads=None):
+        super().__init__(model_path)
+        if num_threads:
+            import tensorflow as tf
+            tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+        self.model = load_mri_model(model_path)
+
+    def predict(self, batch):
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+class TFLiteBackend(InferenceBackend):
+    """One interpreter per backend; it is not thread-safe, so sessions take turns through ``_lock``."""
+
+    name = "tflite"
+
+    def __init__(self, model_path, num_threads=None):
+        super().__init__(model_path)
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+
+    def _resize(self, batch_size):
+        self.interpreter.resize_tensor_input(self._input["index"], [batch_size, *IMAGE_SIZE, 3])
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = batch_size
+
+    def predict(self, batch):
+        # Resizing, setting the input, invoking and reading the output share the interpreter's buffers
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self._resize(len(batch))
+            input_details, output_details = self._input, self._output
+
+            # Quantized models take integer inputs: q = x / scale + zero_point
+            if np.issubdtype(input_details["dtype"], np.integer):
+                scale, zero_point = input_details["quantization"]
+                batch = np.round(batch / scale + zero_point).astype(input_details["dtype"])
+            else:
+                batch = batch.astype(input_details["dtype"], copy=False)
+
+            self.interpreter.set_tensor(input_details["index"], batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(output_details["index"])  # a copy, safe to use unlocked
+
+        if np.issubdtype(output_details["dtype"], np.integer):
+            scale, zero_point = output_details["quantization"]
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+class OnnxBackend(InferenceBackend):
+    name = "onnx"
+
+    def __init__(self, model_path, num_threads=None):
+        super().__init__(model_path)
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        return self.session.run(None, {self._input_name: batch.astype(np.float32, copy=False)})[0]
+
+
+ENGINES = {backend.name: backend for backend in (KerasBackend, TFLiteBackend, OnnxBackend)}
+
+
+def load_backend(engine="keras", model_path=None, num_threads=None):
+    """Builds the backend for ``engine``, using its default model path unless one is given."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown inference engine '{engine}'. Choose one of: {', '.join(ENGINES)}")
+    return ENGINES[engine](model_path or DEFAULT_MODEL_PATHS[engine], num_threads=num_threads)
+
+
+# ✅ Export
+def load_reference_images(reference_dir, limit=None):
+    """Loads a directory of JPG/PNG scans as one preprocessed float32 batch."""
+    names = sorted(f for f in os.listdir(reference_dir) if f.lower().endswith(SCAN_EXTENSIONS))[:limit]
+    if not names:
+        raise ValueError(f"No JPG/PNG images found in {reference_dir}")
+    images = np.empty((len(names),) + IMAGE_SIZE + (3,), dtype=np.float32)
+    for i, name in enumerate(names):
+        with Image.open(os.path.join(reference_dir, name)) as image:
+            preprocess_into(image, images[i])
+    return names, images
+
+
+def export_tflite(output_path=None, keras_path=MODEL_PATH, quantization=None, representative_images=None):
+    """Converts the Keras model to TFLite, optionally with float16, dynamic range or int8 quantization.
+
+    Full int8 quantization needs ``representative_images`` to calibrate activation ranges.
+    Inputs and outputs stay float32 so the backend can be swapped in without other changes.
+    """
+    import tensorflow as tf
+
+    if quantization not in (None,) + QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization '{quantization}'")
+    output_path = output_path or DEFAULT_MODEL_PATHS["tflite"]
+    converter = tf.lite.TFLiteConverter.from_keras_model(load_mri_model(keras_path))
+    if quantization:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if representative_images is None:
+            raise ValueError("int8 quantization needs representative images (--reference-dir)")
+        converter.representative_dataset = lambda: ([image[None]] for image in representative_images)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+    return output_path
+
+
+def export_onnx(output_path=None, keras_path=MODEL_PATH, opset=13):
+    """Converts the Keras model to ONNX with a dynamic batch dimension."""
+    import tensorflow as tf
+    import tf2onnx
+
+    output_path = output_path or DEFAULT_MODEL_PATHS["onnx"]
+    spec = (tf.TensorSpec((None,) + IMAGE_SIZE + (3,), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(load_mri_model(keras_path), input_signature=spec, opset=opset, output_path=output_path)
+    return output_path
+
+
+# ✅ Parity Check
+def check_parity(backend, reference_backend, images, batch_size=32):
+    """Compares predicted classes of ``backend`` against ``reference_backend`` (normally Keras).
+
+    Returns a dict with the agreement rate, the indexes of mismatching images and
+    the largest absolute probability difference.
+    """
+    mismatches, max_diff = [], 0.0
+    for start in range(0, len(images), batch_size):
+        batch = images[start:start + batch_size]
+        expected = reference_backend.predict(batch)
+        actual = backend.predict(batch)
+        max_diff = max(max_diff, float(np.max(np.abs(expected - actual))))
+        differs = np.argmax(expected, axis=1) != np.argmax(actual, axis=1)
+        mismatches.extend(int(start + i) for i in np.flatnonzero(differs))
+    return {
+        "engine": backend.name,
+        "images": len(images),
+        "agreement": 1.0 - len(mismatches) / len(images),
+        "mismatches": mismatches,
+        "max_probability_diff": max_diff,
+        "passed": not mismatches,
+    }
+
+
+# ✅ Command Line Interface
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export and verify optimized MRI inference models.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Export the Keras model to a lean runtime format")
+    export.add_argument("format", choices=("tflite", "onnx"))
+    export.add_argument("-o", "--output", default=None)
+    export.add_argument("--keras-model", default=MODEL_PATH)
+    export.add_argument("--quantize", choices=QUANTIZATION_MODES, default=None, help="TFLite only")
+    export.add_argument("--reference-dir", default=None, help="Images for int8 calibration and a parity check")
+
+    parity = commands.add_parser("parity", help="Check an engine predicts the same classes as Keras")
+    parity.add_argument("engine", choices=tuple(ENGINES))
+    parity.add_argument("--model", default=None)
+    parity.add_argument("--keras-model", default=MODEL_PATH)
+    parity.add_argument("--reference-dir", required=True)
+    args = parser.parse_args(argv)
+
+    images = None
+    if args.reference_dir:
+        names, images = load_reference_images(args.reference_dir)
+
+    if args.command == "export":
+        if args.format == "tflite":
+            path = export_tflite(args.output, args.keras_model, args.quantize, images)
+        else:
+            path = export_onnx(args.output, args.keras_model)
+        print(f"✅ Exported {args.format} model to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+        if images is None:
+            return 0
+        engine, model_path = args.format, path
+    else:
+        engine, model_path = args.engine, args.model
+
+    report = check_parity(load_backend(engine, model_path), KerasBackend(args.keras_model), images)
+    print(f"{'✅' if report['passed'] else '❌'} {engine} parity: {report['agreement']:.2%} agreement "
+          f"on {report['images']} images, max probability diff {report['max_probability_diff']:.4f}")
+    for i in report["mismatches"]:
+        print(f"   mismatch: {names[i]}")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,323 @@
+"""Local MRI inference service with dynamic micro-batching.
+
+Concurrent requests are merged into one model call: the batching thread takes
+the first queued scan, then keeps collecting until ``max_batch_size`` scans
+are waiting or ``max_wait_ms`` has passed.
+
+Usage:
+    python -m cognitex.inference_server [--engine keras] [--port 8765] [--max-batch-size 16] [--max-wait-ms 5]
+    python -m cognitex.inference_server --registry model/registry    serve the registry's current version, hot-reloaded
+
+Endpoints:
+    POST /predict   raw JPG/PNG bytes -> {"class_index", "condition", "probabilities"}
+    GET  /stats     queue depth, batch size histogram and timings
+    GET  /metrics   per-stage latency histograms in the Prometheus text format
+    GET  /health    {"status": "ok", "engine", "model_version"}
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from cognitex.mri import IMAGE_SIZE, MAX_SCAN_BYTES, ScanRejected, open_scan, preprocess_into, condition_label
+from cognitex.inference import DEFAULT_MODEL_PATHS, ENGINES, load_backend
+from cognitex.prediction_cache import model_version
+from cognitex.metrics import prometheus_text, trace
+from cognitex.model_registry import ModelRegistry
+
+DEFAULT_PORT = 8765
+DRAIN_LIMIT = 4 * MAX_SCAN_BYTES  # larger oversized bodies are not read at all
+DRAIN_CHUNK = 64 * 1024
+_CLOSE = object()
+
+
+# ✅ Micro-batching
+class BatchStats:
+    """Thread-safe counters describing how requests were batched."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.batch_sizes = Counter()
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.total_inference = 0.0
+
+    def record_enqueue(self, depth):
+        with self._lock:
+            self.requests += 1
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def record_batch(self, size, wait, inference):
+        with self._lock:
+            self.batches += 1
+            self.batch_sizes[size] += 1
+            self.total_wait += wait
+            self.total_inference += inference
+
+    def snapshot(self, queue_depth):
+        with self._lock:
+            return {
+                "queue_depth": queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+                "batch_sizes": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+                "mean_queue_wait_ms": 1000 * self.total_wait / self.batches if self.batches else 0.0,
+                "mean_inference_ms": 1000 * self.total_inference / self.batches if self.batches else 0.0,
+            }
+
+
+class MicroBatcher:
+    """Owns an inference backend and runs queued single-scan requests in merged batches."""
+
+    def __init__(self, backend, max_batch_size=16, max_wait_ms=5.0):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = BatchStats()
+        self._queue = queue.Queue()
+        self._batch = np.zeros((max_batch_size,) + IMAGE_SIZE + (3,), dtype=np.float32)
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image):
+        """Queues one preprocessed (176, 176, 3) scan and returns a Future of its probabilities."""
+        future = Future()
+        self._queue.put((np.asarray(image, dtype=np.float32).reshape(self._batch.shape[1:]), future, time.perf_counter()))
+        self.stats.record_enqueue(self._queue.qsize())
+        return future
+
+    def predict(self, image, timeout=None):
+        return self.submit(image).result(timeout)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _CLOSE:
+            return None
+        items = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _CLOSE:
+                self._queue.put(_CLOSE)  # finish this batch, stop on the next loop
+                break
+            items.append(item)
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            if items is None:
+                return
+            size = len(items)
+            for slot, (image, _, _) in enumerate(items):
+                self._batch[slot] = image
+            started = time.perf_counter()
+            try:
+                with trace("inference_batch"):
+                    probabilities = self.backend.predict(self._batch[:size])
+            except Exception as err:
+                for _, future, _ in items:
+                    future.set_exception(err)
+                continue
+            finished = time.perf_counter()
+            self.stats.record_batch(size, started - items[0][2], finished - started)
+            for slot, (_, future, _) in enumerate(items):
+                future.set_result(np.array(probabilities[slot], dtype=np.float32))
+
+    def close(self):
+        self._queue.put(_CLOSE)
+        self._thread.join()
+
+
+# ✅ HTTP Service
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, payload, close=False):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if close:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(200, self.server.batcher.stats.snapshot(self.server.batcher.queue_depth()))
+        elif self.path == "/metrics":
+            body = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/health":
+            registry = self.server.registry
+            self._reply(200, {"status": "ok",
+                              "engine": registry.engine if registry else self.server.engine,
+                              "model_version": registry.version if registry else self.server.model_version})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def _discard(self, length):
+        """Drains a rejected body in small chunks so the client can read the reply, up to DRAIN_LIMIT bytes.
+
+        Anything larger is left unread; the connection is closed after the reply either way.
+        """
+        if length > DRAIN_LIMIT:
+            return
+        while length > 0:
+            chunk = self.rfile.read(min(DRAIN_CHUNK, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self._reply(400, {"error": "Content-Length must be a byte count."}, close=True)  # the body can't be framed
+            return
+        if length > MAX_SCAN_BYTES:
+            self._discard(length)
+            self._reply(413, {"error": f"Scan is {length / 1e6:.1f} MB, the limit is {MAX_SCAN_BYTES / 1e6:.0f} MB."},
+                        close=True)
+            return
+        try:
+            image = np.empty(IMAGE_SIZE + (3,), dtype=np.float32)
+            with trace("upload_decode"):
+                scan = open_scan(self.rfile.read(length))
+            with scan, trace("preprocess"):
+                preprocess_into(scan, image)
+        except ScanRejected as err:
+            self._reply(400, {"error": str(err)})
+            return
+        try:
+            with trace("inference"):
+                probabilities = self.server.batcher.predict(image, timeout=self.server.request_timeout)
+        except Exception as err:
+            self._reply(500, {"error": str(err)})
+            return
+        class_index = int(np.argmax(probabilities))
+        self._reply(200, {"class_index": class_index, "condition": condition_label(class_index),
+                          "probabilities": probabilities.tolist()})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(batcher, host="127.0.0.1", port=DEFAULT_PORT, engine="", version="", request_timeout=60.0,
+                 registry=None):
+    """Starts the HTTP service on a daemon thread and returns the server.
+
+    With a ``registry``, /health reports its current engine and version instead of the fixed ones.
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.batcher = batcher
+    server.registry = registry
+    server.engine = engine
+    server.model_version = version
+    server.request_timeout = request_timeout
+    threading.Thread(target=server.serve_forever, name="inference-server", daemon=True).start()
+    return server
+
+
+# ✅ Client
+class InferenceClient:
+    """Calls a running inference service; used by the Predict page when INFERENCE_SERVER_URL is set."""
+
+    def __init__(self, url, timeout=60.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _get(self, path):
+        with urllib.request.urlopen(self.url + path, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def predict(self, scan_bytes):
+        """Returns (class_index, probabilities) for raw JPG/PNG bytes."""
+        request = urllib.request.Request(self.url + "/predict", data=bytes(scan_bytes), method="POST",
+                                         headers={"Content-Type": "application/octet-stream"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read())
+        except urllib.error.HTTPError as err:
+            message = json.loads(err.read() or b"{}").get("error", str(err))
+            if err.code in (400, 413):
+                raise ScanRejected(message) from err
+            raise RuntimeError(f"Inference server error {err.code}: {message}") from err
+        return payload["class_index"], np.asarray(payload["probabilities"], dtype=np.float32)
+
+    def stats(self):
+        return self._get("/stats")
+
+    def model_version(self):
+        return self._get("/health")["model_version"]
+
+
+# ✅ Command Line Interface
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the MRI model with dynamic micro-batching.")
+    parser.add_argument("--engine", choices=tuple(ENGINES), default="keras")
+    parser.add_argument("--model", default=None, help="Model path (default: the engine's exported model)")
+    parser.add_argument("--threads", type=int, default=None, help="Inference threads")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--registry", default=None, help="Serve a model registry's current version instead")
+    args = parser.parse_args(argv)
+
+    if args.registry:
+        registry = ModelRegistry(args.registry, args.threads)
+        batcher = MicroBatcher(registry, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+        server = start_server(batcher, args.host, args.port, registry=registry)
+        engine = f"registry {registry.version}"
+    else:
+        model_path = args.model or DEFAULT_MODEL_PATHS[args.engine]
+        batcher = MicroBatcher(load_backend(args.engine, model_path, args.threads),
+                               max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+        server = start_server(batcher, args.host, args.port, args.engine, model_version(model_path, args.engine))
+        engine = args.engine
+    print(f"✅ Inference server ({engine}) listening on http://{args.host}:{args.port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        batcher.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,188 @@
+"""Per-stage request timing with Prometheus text export.
+
+Stages are timed with ``trace("inference")`` (a context manager) and kept in
+process-wide histograms. Each histogram holds cumulative bucket counts for
+Prometheus, plus a rolling window of recent samples for percentiles on the
+Admin page. Recording a sample is a lock, a bisect and a few increments, so
+it is cheap enough for every request.
+
+Export options:
+    prometheus_text()               the text exposition format, e.g. for the Admin page
+    start_metrics_server(port)      serves it at http://host:port/metrics from a daemon thread
+    start_metrics_file(path, 15)    rewrites a file for node_exporter's textfile collector
+"""
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+WINDOW = 1024  # recent samples kept per stage for percentiles
+METRIC_PREFIX = "cognitex"
+
+
+# ✅ Histograms
+class Histogram:
+    """Cumulative Prometheus buckets plus a rolling window of recent samples."""
+
+    def __init__(self, buckets=BUCKETS, window=WINDOW):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.sum += seconds
+            self.errors += error
+            self.recent.append(seconds)
+
+    def snapshot(self):
+        """Returns a consistent copy of the counters and recent samples."""
+        with self._lock:
+            return {"counts": list(self.counts), "count": self.count, "sum": self.sum, "errors": self.errors,
+                    "recent": np.fromiter(self.recent, dtype=np.float64, count=len(self.recent))}
+
+
+class Registry:
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def histogram(self, stage):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram())
+        return histogram
+
+    def observe(self, stage, seconds, error=False):
+        self.histogram(stage).observe(seconds, error)
+
+    def stages(self):
+        with self._lock:
+            return sorted(self._histograms.items())
+
+
+REGISTRY = Registry()
+
+
+@contextmanager
+def trace(stage, registry=REGISTRY):
+    """Times the enclosed block as one sample of ``stage``; exceptions are counted as errors and re-raised."""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        registry.observe(stage, time.perf_counter() - started, error)
+
+
+# ✅ Summaries and Export
+def summary(registry=REGISTRY):
+    """One dict per stage with count, errors, mean and recent p50/p95/p99 in milliseconds."""
+    rows = []
+    for stage, histogram in registry.stages():
+        snap = histogram.snapshot()
+        recent = snap["recent"]
+        p50, p95, p99 = np.percentile(recent, (50, 95, 99)) * 1000 if len(recent) else (0.0, 0.0, 0.0)
+        rows.append({
+            "stage": stage,
+            "count": snap["count"],
+            "errors": snap["errors"],
+            "mean_ms": snap["sum"] / snap["count"] * 1000 if snap["count"] else 0.0,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+        })
+    return rows
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(registry=REGISTRY):
+    """Renders every stage histogram in the Prometheus text exposition format."""
+    name = f"{METRIC_PREFIX}_stage_duration_seconds"
+    errors = f"{METRIC_PREFIX}_stage_errors_total"
+    lines = [f"# HELP {name} Time spent in each request stage.", f"# TYPE {name} histogram"]
+    error_lines = [f"# HELP {errors} Stage executions that raised.", f"# TYPE {errors} counter"]
+    for stage, histogram in registry.stages():
+        snap = histogram.snapshot()
+        label = f'stage="{_label(stage)}"'
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float("inf"),), snap["counts"]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{label},le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{label}}} {snap['sum']:.6f}")
+        lines.append(f"{name}_count{{{label}}} {snap['count']}")
+        error_lines.append(f"{errors}{{{label}}} {snap['errors']}")
+    uptime = f"{METRIC_PREFIX}_process_start_time_seconds"
+    lines += error_lines + [f"# TYPE {uptime} gauge", f"{uptime} {registry.started_at:.0f}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path, registry=REGISTRY):
+    """Writes the exposition atomically, so a scraper never reads half a file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text(registry))
+    os.replace(tmp_path, path)
+
+
+def start_metrics_file(path, interval=15, registry=REGISTRY):
+    """Rewrites ``path`` every ``interval`` seconds from a daemon thread."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def run():
+        while True:
+            try:
+                write_metrics_file(path, registry)
+            except OSError as err:
+                print(f"⚠️ Could not write metrics to {path}: {err}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_metrics_server(port, host="0.0.0.0", registry=REGISTRY):
+    """Serves ``GET /metrics`` from a daemon thread and returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text(registry).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"✅ Metrics at http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,240 @@
+"""Versioned MRI model registry shared by every worker process on a node.
+
+Layout:
+    model/registry/
+        CURRENT                         name of the active version (swapped atomically)
+        20261018120000-1a2b3c4d/
+            model.tflite                read-only artifact
+            manifest.json               version, engine, file, sha256, source, created_at
+
+``publish`` copies an exported model into a new version directory and only
+then replaces CURRENT with ``os.replace``, so a reader sees the old version
+or the new one, never half of either. Workers attach through
+``ModelRegistry``: it re-reads CURRENT at most every ``check_interval``
+seconds, warms the new backend up with one prediction and swaps it in
+without a restart; a version that fails to load is skipped and the old one
+keeps serving. Requests already running finish on the backend they started
+with.
+
+Weights are shared through the page cache. TFLite builds its model straight
+from an mmap of the artifact and uses the float weights in place, so N Streamlit
+processes hold one copy of them instead of N. ONNX and Keras artifacts get
+versioning and hot reload too, but each process still loads its own copy.
+
+Usage:
+    python -m cognitex.model_registry publish model/my_model.tflite [--registry DIR] [--keep 5]
+    python -m cognitex.model_registry list
+    python -m cognitex.model_registry activate VERSION       roll back or forward
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from cognitex.inference import ENGINES, load_backend
+from cognitex.mri import IMAGE_SIZE
+
+REGISTRY_DIR = "model/registry"
+CURRENT = "CURRENT"
+MANIFEST = "manifest.json"
+ENGINE_EXTENSIONS = {".tflite": "tflite", ".onnx": "onnx", ".h5": "keras", ".keras": "keras"}
+SHARED_ENGINES = ("tflite",)  # engines whose weights are used in place from the mmap
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# ✅ Publishing
+def versions(root=REGISTRY_DIR):
+    """Published version names, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if os.path.isfile(os.path.join(root, name, MANIFEST)))
+
+
+def current_version(root=REGISTRY_DIR):
+    try:
+        with open(os.path.join(root, CURRENT), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_manifest(root, version):
+    with open(os.path.join(root, version, MANIFEST), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def activate(version, root=REGISTRY_DIR):
+    """Points CURRENT at ``version``; attached workers pick it up on their next check."""
+    if version not in versions(root):
+        raise ValueError(f"Unknown model version '{version}'")
+    _write_atomic(os.path.join(root, CURRENT), version + "\n")
+
+
+def publish(artifact_path, root=REGISTRY_DIR, engine=None, keep=5, make_current=True):
+    """Copies ``artifact_path`` into a new read-only version and (by default) activates it. Returns the manifest."""
+    extension = os.path.splitext(artifact_path)[1].lower()
+    engine = engine or ENGINE_EXTENSIONS.get(extension)
+    if engine not in ENGINES:
+        raise ValueError(f"Cannot tell the engine of '{artifact_path}', pass --engine")
+    sha256 = _file_sha256(artifact_path)
+    version = f"{datetime.now():%Y%m%d%H%M%S}-{sha256[:8]}"
+    manifest = {
+        "version": version,
+        "engine": engine,
+        "file": "model" + extension,
+        "sha256": sha256,
+        "source": os.path.abspath(artifact_path),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    # Build the version in a temporary directory and rename it into place in one step
+    tmp_dir = os.path.join(root, f".{version}.{os.getpid()}.tmp")
+    os.makedirs(tmp_dir)
+    shutil.copyfile(artifact_path, os.path.join(tmp_dir, manifest["file"]))
+    os.chmod(os.path.join(tmp_dir, manifest["file"]), 0o444)
+    with open(os.path.join(tmp_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_dir, os.path.join(root, version))
+
+    if make_current:
+        activate(version, root)
+    if engine not in SHARED_ENGINES:
+        print(f"⚠️ {engine} weights are loaded separately by every process; publish a tflite export to share them.")
+    prune(root, keep)
+    return manifest
+
+
+def prune(root=REGISTRY_DIR, keep=5):
+    """Deletes the oldest versions beyond ``keep``, never the current one."""
+    active = current_version(root)
+    stale = [version for version in versions(root) if version != active]
+    for version in stale[:max(0, len(stale) - (keep - 1))]:
+        shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+
+
+# ✅ Attaching from Worker Processes
+class ModelRegistry:
+    """Serves predictions from the registry's current version, reloading when CURRENT changes.
+
+    Exposes ``predict``/``predict_classes`` like an InferenceBackend, so it can
+    be handed to the micro-batcher or the volume scorer unchanged.
+    """
+
+    def __init__(self, root=REGISTRY_DIR, num_threads=None, check_interval=5.0):
+        self.root = root
+        self.num_threads = num_threads
+        self.check_interval = check_interval
+        self.manifest = None
+        self._backend = None
+        self._checked = 0.0
+        self._failed = None  # a version that failed to load is not retried until CURRENT changes again
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        self.backend()
+        return self.manifest["version"]
+
+    @property
+    def engine(self):
+        self.backend()
+        return self.manifest["engine"]
+
+    def backend(self):
+        """Returns the backend for the current version, checking for a new one every ``check_interval`` seconds."""
+        if self._backend is None or time.monotonic() - self._checked >= self.check_interval:
+            self._refresh()
+        return self._backend
+
+    def _refresh(self):
+        with self._lock:
+            if self._backend is not None and time.monotonic() - self._checked < self.check_interval:
+                return  # another thread just checked
+            self._checked = time.monotonic()
+            version = current_version(self.root)
+            if version is None:
+                if self._backend is None:
+                    raise FileNotFoundError(f"No model has been published to {self.root}")
+                return
+            if version == self._failed or (self.manifest is not None and version == self.manifest["version"]):
+                return
+            try:
+                manifest = load_manifest(self.root, version)
+                backend = load_backend(manifest["engine"], os.path.join(self.root, version, manifest["file"]),
+                                       self.num_threads)
+                backend.predict(np.zeros((1,) + IMAGE_SIZE + (3,), dtype=np.float32))  # warm up before swapping in
+            except Exception as err:
+                if self._backend is None:
+                    raise
+                self._failed = version
+                print(f"⚠️ Could not load model version {version}, still serving {self.manifest['version']}: {err}")
+                return
+            self._backend, self.manifest = backend, manifest
+            print(f"✅ Loaded model version {version} ({manifest['engine']})")
+
+    def predict(self, batch):
+        return self.backend().predict(batch)
+
+    def predict_classes(self, batch):
+        return self.backend().predict_classes(batch)
+
+
+# ✅ Command Line Interface
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish and switch versions of the MRI model.")
+    parser.add_argument("--registry", default=REGISTRY_DIR, help="Registry directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("publish", help="Add an exported model as a new version and activate it")
+    add.add_argument("artifact")
+    add.add_argument("--engine", choices=tuple(ENGINES), default=None, help="Default: from the file extension")
+    add.add_argument("--keep", type=int, default=5, help="Versions to keep on disk")
+    add.add_argument("--no-activate", action="store_true", help="Publish without switching workers to it")
+    commands.add_parser("list", help="Show published versions")
+    switch = commands.add_parser("activate", help="Switch every worker to an existing version")
+    switch.add_argument("version")
+    args = parser.parse_args(argv)
+
+    if args.command == "publish":
+        os.makedirs(args.registry, exist_ok=True)
+        manifest = publish(args.artifact, args.registry, args.engine, args.keep, not args.no_activate)
+        print(f"✅ Published {manifest['version']} ({manifest['engine']})"
+              f"{'' if args.no_activate else ', workers switch within seconds'}.")
+    elif args.command == "activate":
+        try:
+            activate(args.version, args.registry)
+        except ValueError as err:
+            print(f"❌ {err}")
+            return 1
+        print(f"✅ Activated {args.version}.")
+    else:
+        active = current_version(args.registry)
+        for version in versions(args.registry):
+            manifest = load_manifest(args.registry, version)
+            print(f"{'*' if version == active else ' '} {version}  {manifest['engine']:<6}  {manifest['source']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
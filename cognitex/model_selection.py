@@ -0,0 +1,205 @@
+"""Model selection and training for the tabular ADNI classifier.
+
+The notebooks' candidates (LDA, logistic regression, random forest, ridge) are
+cross-validated on the same stratified folds. The folds are encoded, imputed
+and scaled once and cached on disk, keyed by a hash of the data file, so that
+neither extra candidates nor reruns redo the preprocessing. Every
+(candidate, fold) fit runs as its own job across all cores.
+
+Fit time, predict time and accuracy metrics are written to a results table.
+The candidate with the best mean CV accuracy is refit on all rows and saved as
+a versioned artifact, ``model/adni_tabular-<version>.joblib``. It is also
+copied to ``model/adni_tabular.joblib``, the file the app loads.
+
+Usage:
+    python -m cognitex.model_selection [--data CSV] [--folds 5] [--jobs -1] [--candidates logistic,ridge]
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from cognitex.tabular import DATA_PATH, MODEL_PATH, TabularModel, build_pipeline, build_preprocessor, load_training_data
+
+CACHE_DIR = "cache/training"
+RESULTS_PATH = "model/training_results.csv"
+RANDOM_STATE = 123
+
+
+def make_candidates():
+    """The notebooks' classifiers, each single-threaded because the harness parallelizes across fits."""
+    from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression, RidgeClassifier
+    return {
+        "lda": LinearDiscriminantAnalysis(solver="svd", tol=0.0001),
+        # lbfgs converges in well under 1000 iterations on these 22 features; the notebook's 1e6 cap never applied
+        "logistic": LogisticRegression(solver="lbfgs", max_iter=1000),
+        "random_forest": RandomForestClassifier(n_estimators=100, max_features="sqrt", random_state=RANDOM_STATE,
+                                                n_jobs=1),
+        "ridge": RidgeClassifier(alpha=1.0, random_state=RANDOM_STATE),
+    }
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ✅ Cached Folds
+def _prepare_folds(data_path, data_digest, n_folds, random_state):
+    """Encodes the data and returns its preprocessed CV folds as (X_train, y_train, X_test, y_test) tuples.
+
+    ``data_digest`` is only part of the cache key, so an edited csv gets new folds.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    X, y = load_training_data(data_path)
+    folds = []
+    for train_index, test_index in StratifiedKFold(n_folds, shuffle=True, random_state=random_state).split(X, y):
+        preprocessor = build_preprocessor().fit(X[train_index])
+        folds.append((preprocessor.transform(X[train_index]).astype(np.float32), y[train_index],
+                      preprocessor.transform(X[test_index]).astype(np.float32), y[test_index]))
+    return folds
+
+
+def load_folds(data_path=DATA_PATH, n_folds=5, random_state=RANDOM_STATE, cache_dir=CACHE_DIR):
+    """Returns the preprocessed folds, computing them only when the data or fold settings change."""
+    from joblib import Memory
+    prepare = Memory(cache_dir, verbose=0).cache(_prepare_folds) if cache_dir else _prepare_folds
+    return prepare(data_path, file_digest(data_path), n_folds, random_state)
+
+
+# ✅ Parallel Fits
+def _fit_fold(name, estimator, fold_index, fold):
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
+    X_train, y_train, X_test, y_test = fold
+    started = time.perf_counter()
+    estimator.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    y_pred = estimator.predict(X_test)
+    predict_seconds = time.perf_counter() - started
+    return {
+        "candidate": name,
+        "fold": fold_index,
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, average="weighted", zero_division=0),
+        "recall": recall_score(y_test, y_pred, average="weighted", zero_division=0),
+        "f1": f1_score(y_test, y_pred, average="weighted", zero_division=0),
+    }
+
+
+def evaluate(candidates, folds, n_jobs=-1):
+    """Runs every (candidate, fold) fit in parallel and returns one row per fit."""
+    from joblib import Parallel, delayed
+    from sklearn.base import clone
+
+    rows = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(name, clone(estimator), index, fold)
+        for name, estimator in candidates.items()
+        for index, fold in enumerate(folds)
+    )
+    return pd.DataFrame(rows)
+
+
+def summarize(fold_results):
+    """Mean (and spread of accuracy) per candidate, best first."""
+    summary = fold_results.groupby("candidate").agg(
+        cv_accuracy=("accuracy", "mean"), cv_accuracy_std=("accuracy", "std"),
+        precision=("precision", "mean"), recall=("recall", "mean"), f1=("f1", "mean"),
+        fit_seconds=("fit_seconds", "mean"), predict_seconds=("predict_seconds", "mean"),
+    )
+    return summary.sort_values("cv_accuracy", ascending=False)
+
+
+def format_results(summary):
+    """Markdown table of the summary, in the style of the startup report."""
+    lines = ["| Candidate | CV accuracy | F1 | Fit (ms) | Predict (ms) |", "|---|---:|---:|---:|---:|"]
+    for name, row in summary.iterrows():
+        lines.append(f"| {name} | {row.cv_accuracy:.2%} ± {row.cv_accuracy_std:.2%} | {row.f1:.2%} "
+                     f"| {row.fit_seconds * 1000:.1f} | {row.predict_seconds * 1000:.2f} |")
+    return "\n".join(lines)
+
+
+# ✅ Versioned Artifact
+def export_winner(name, estimator, summary, data_path, data_digest, model_path=MODEL_PATH):
+    """Refits the winner on every row and saves it as ``<model>-<version>.joblib`` plus ``model_path``."""
+    import sklearn
+
+    X, y = load_training_data(data_path)
+    stamp = datetime.now(timezone.utc)
+    version = f"{stamp:%Y%m%d%H%M%S}-{data_digest[:8]}"
+    metadata = {
+        "version": version,
+        "candidate": name,
+        "trained_at": stamp.isoformat(timespec="seconds"),
+        "data": os.path.basename(data_path),
+        "data_sha256": data_digest,
+        "rows": int(len(y)),
+        "sklearn": sklearn.__version__,
+        "metrics": {key: float(value) for key, value in summary.loc[name].items()},
+    }
+    model = TabularModel(build_pipeline(estimator).fit(X, y), metadata=metadata)
+    stem, ext = os.path.splitext(model_path)
+    versioned = model.save(f"{stem}-{version}{ext}")
+    tmp_path = f"{model_path}.tmp"
+    shutil.copyfile(versioned, tmp_path)
+    os.replace(tmp_path, model_path)
+    return versioned
+
+
+def run(data_path=DATA_PATH, model_path=MODEL_PATH, results_path=RESULTS_PATH, n_folds=5, n_jobs=-1,
+        names=None, cache_dir=CACHE_DIR):
+    """Cross-validates the candidates, writes the results table and exports the winner."""
+    candidates = make_candidates()
+    if names:
+        unknown = set(names) - set(candidates)
+        if unknown:
+            raise ValueError(f"Unknown candidate(s): {', '.join(sorted(unknown))}. Choose from {', '.join(candidates)}.")
+        candidates = {name: candidates[name] for name in names}
+
+    data_digest = file_digest(data_path)
+    folds = load_folds(data_path, n_folds, RANDOM_STATE, cache_dir)
+    fold_results = evaluate(candidates, folds, n_jobs)
+    summary = summarize(fold_results)
+
+    os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+    fold_results.to_csv(results_path, index=False)
+    winner = summary.index[0]
+    artifact = export_winner(winner, candidates[winner], summary, data_path, data_digest, model_path)
+    return summary, winner, artifact
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validate the tabular candidates and export the best one.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("-o", "--output", default=MODEL_PATH, help="Model path the app loads")
+    parser.add_argument("--results", default=RESULTS_PATH, help="Per-fold results table (csv)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel fits (-1 = all cores)")
+    parser.add_argument("--candidates", default=None, help="Comma separated subset, e.g. logistic,ridge")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute the preprocessed folds")
+    args = parser.parse_args(argv)
+
+    names = args.candidates.split(",") if args.candidates else None
+    summary, winner, artifact = run(args.data, args.output, args.results, args.folds, args.jobs, names,
+                                    None if args.no_cache else CACHE_DIR)
+    print(format_results(summary))
+    print(f"✅ Best model: {winner}, saved as {artifact} and {args.output} (fold results in {args.results})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+import io
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+# ✅ MRI Model Settings (shared by the Predict page and the batch scorer)
+MODEL_PATH = "model/my_model.h5"
+IMAGE_SIZE = (176, 176)
+SCAN_EXTENSIONS = (".jpg", ".jpeg", ".png")
+CONDITION_LABELS = {0: "Mild Dementia", 1: "Moderate Dementia", 2: "No Dementia", 3: "Very Mild Dementia"}
+
+# ✅ Upload Limits (checked from the file header, before anything is decoded)
+SCAN_FORMATS = ("JPEG", "PNG")
+MAX_SCAN_BYTES = 20 * 1024 * 1024
+MAX_SCAN_PIXELS = 40_000_000
+
+
+class ScanRejected(ValueError):
+    """Raised when an upload is not a usable JPG/PNG scan."""
+
+
+def load_mri_model(model_path=MODEL_PATH):
+    """Loads the Keras MRI classifier from disk."""
+    from tensorflow.keras.models import load_model
+    return load_model(model_path)
+
+
+def _byte_size(scan):
+    if isinstance(scan, (bytes, bytearray, memoryview)):
+        return len(scan)
+    position = scan.tell()
+    scan.seek(0, io.SEEK_END)  # mmap.seek returns None, so read the size with tell()
+    size = scan.tell()
+    scan.seek(position)
+    return size
+
+
+def open_scan(scan):
+    """Opens an uploaded scan (bytes, file object or mmap) after validating its header.
+
+    ``Image.open`` only parses the header, so format, dimensions and byte size
+    are checked without decoding any pixel data.
+    """
+    size = _byte_size(scan)
+    if size > MAX_SCAN_BYTES:
+        raise ScanRejected(f"Scan is {size / 1e6:.1f} MB, the limit is {MAX_SCAN_BYTES / 1e6:.0f} MB.")
+    if isinstance(scan, (bytes, bytearray, memoryview)):
+        scan = io.BytesIO(scan)
+    try:
+        image = Image.open(scan)
+    except (UnidentifiedImageError, OSError) as err:
+        raise ScanRejected(f"Not a readable image: {err}") from err
+
+    width, height = image.size
+    if image.format not in SCAN_FORMATS:
+        image.close()
+        raise ScanRejected(f"Unsupported image format {image.format}, upload a JPG or PNG.")
+    if width < 1 or height < 1 or width * height > MAX_SCAN_PIXELS:
+        image.close()
+        raise ScanRejected(f"Scan is {width}x{height} pixels, the limit is {MAX_SCAN_PIXELS:,} pixels.")
+    return image
+
+
+def preprocess_into(image, out):
+    """Resizes ``image`` and writes it normalized to [0, 1] into the float32 ``out`` (176, 176, 3) view.
+
+    JPEGs are downscaled by the decoder itself (``draft``), grayscale scans stay
+    single channel until they are broadcast into ``out``, and the only pixel
+    buffer allocated is the small 176x176 uint8 resize result.
+    """
+    try:  # draft, convert and resize all decode pixel data
+        image.draft("RGB", IMAGE_SIZE)
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+        resized = image.resize(IMAGE_SIZE, reducing_gap=3.0)
+    except (OSError, SyntaxError) as err:  # truncated or corrupt pixel data (PIL raises SyntaxError for bad chunks)
+        raise ScanRejected(f"Could not decode scan: {err}") from err
+
+    pixels = np.asarray(resized)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, None]
+    np.divide(pixels, np.float32(255.0), out=out)
+    return out
+
+
+def preprocess_image(image):
+    """Resizes and normalizes MRI image for model prediction."""
+    batch = np.empty((1,) + IMAGE_SIZE + (3,), dtype=np.float32)
+    preprocess_into(image, batch[0])
+    return batch
+
+
+def condition_label(class_index):
+    """Maps a predicted class index to its human readable condition."""
+    return CONDITION_LABELS.get(int(class_index), "Unknown Condition")
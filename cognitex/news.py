@@ -0,0 +1,168 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from cognitex.metrics import trace
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+REQUEST_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+
+class NewsError(Exception):
+    """Raised when a news source can't deliver articles."""
+
+
+def make_session(pool_size=4, retries=2):
+    """Builds a pooled requests.Session that retries transient failures."""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# ✅ News Sources
+class NewsAPISource:
+    """Articles from NewsAPI's /everything endpoint."""
+
+    def __init__(self, api_key, keyword, session=None, timeout=REQUEST_TIMEOUT, url=NEWS_API_URL):
+        self.api_key = api_key
+        self.keyword = keyword
+        self.url = url
+        self.session = session or make_session()
+        self.timeout = timeout
+
+    def fetch(self):
+        params = {"q": self.keyword, "apiKey": self.api_key, "language": "en", "searchIn": "title"}
+        try:
+            response = self.session.get(self.url, params=params, timeout=self.timeout)
+            data = response.json()
+        except (requests.RequestException, ValueError) as err:
+            raise NewsError(f"🌐 Network error: {err}") from err
+        if response.status_code != 200:
+            raise NewsError(f"❌ API Error {response.status_code}: {data.get('message', 'Unknown error')}")
+        return data.get("articles", [])
+
+
+class FixtureSource:
+    """Articles from a local JSON file, either a NewsAPI response or a plain list (for tests and demos)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as err:
+            raise NewsError(f"Could not read news fixture {self.path}: {err}") from err
+        return data.get("articles", []) if isinstance(data, dict) else data
+
+
+# ✅ Thumbnail Cache
+class ThumbnailCache:
+    """Downloads article images once, shrinks them and serves them from disk."""
+
+    def __init__(self, directory, size=(640, 360), session=None, timeout=REQUEST_TIMEOUT):
+        self.directory = directory
+        self.size = size
+        self.session = session or make_session()
+        self.timeout = timeout
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode()).hexdigest() + ".jpg")
+
+    def get(self, url):
+        """Returns the local thumbnail path for ``url`` if it has been cached, else None."""
+        if not url:
+            return None
+        path = self.path_for(url)
+        return path if os.path.exists(path) else None
+
+    def fetch(self, url):
+        """Downloads and shrinks one image unless it is already cached. Returns the path or None."""
+        from PIL import Image
+
+        path = self.get(url)
+        if path or not url:
+            return path
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                data = response.raw.read(MAX_IMAGE_BYTES + 1, decode_content=True)
+            if len(data) > MAX_IMAGE_BYTES:
+                return None
+            with Image.open(io.BytesIO(data)) as image:
+                image.draft("RGB", self.size)
+                image = image.convert("RGB")
+                image.thumbnail(self.size)
+                path = self.path_for(url)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                image.save(tmp_path, "JPEG", quality=80, optimize=True)
+            os.replace(tmp_path, path)  # readers never see a half written file
+            return path
+        except Exception as err:  # a broken image must not stop the refresh
+            print(f"⚠️ Could not cache thumbnail {url}: {err}")
+            return None
+
+
+# ✅ Background-refreshed Feed
+class NewsCache:
+    """Serves the last fetched articles while a background thread refreshes them every ``ttl`` seconds."""
+
+    def __init__(self, source, ttl=900, thumbnails=None):
+        self.source = source
+        self.ttl = ttl
+        self.thumbnails = thumbnails
+        self.articles = []
+        self.fetched_at = None
+        self.last_error = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="news-refresh", daemon=True)
+        self._thread.start()
+
+    def refresh(self):
+        try:
+            with trace("news_fetch"):
+                articles = self.source.fetch()
+        except NewsError as err:
+            self.last_error = str(err)
+            return
+        self.articles, self.fetched_at, self.last_error = articles, time.time(), None
+        self._ready.set()
+        if self.thumbnails is not None:
+            for article in articles:
+                if self._stop.is_set():
+                    return
+                with trace("news_thumbnail"):
+                    self.thumbnails.fetch(article.get("urlToImage"))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as err:  # an unexpected failure must not end the refresh schedule
+                self.last_error = f"{type(err).__name__}: {err}"
+                print(f"⚠️ News refresh failed: {self.last_error}")
+            if not self._ready.is_set():
+                self._ready.set()  # let the page show the error instead of waiting forever
+            self._stop.wait(self.ttl if self.last_error is None else min(self.ttl, 60))
+
+    def get(self, timeout=15):
+        """Returns the cached articles, waiting for the first fetch if it hasn't finished yet."""
+        self._ready.wait(timeout)
+        return self.articles
+
+    def close(self):
+        self._stop.set()
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# ✅ Content-addressed Prediction Cache
+# Results are keyed by sha256(model version + uploaded bytes). A small in-memory
+# LRU sits in front of a SQLite table that is trimmed to ``max_bytes``. Several
+# processes share the table, possibly on different model versions during a hot
+# reload, so rows of other versions are left to age out through the LRU, and the
+# table's total size is kept in the database by triggers rather than per process.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prediction_cache (
+    key TEXT PRIMARY KEY,
+    model_version TEXT NOT NULL,
+    class_index INTEGER NOT NULL,
+    probabilities BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+SIZE_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS prediction_cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)",
+    """CREATE TRIGGER IF NOT EXISTS prediction_cache_inserted AFTER INSERT ON prediction_cache
+       BEGIN UPDATE prediction_cache_size SET bytes = bytes + NEW.size; END""",
+    """CREATE TRIGGER IF NOT EXISTS prediction_cache_updated AFTER UPDATE OF size ON prediction_cache
+       BEGIN UPDATE prediction_cache_size SET bytes = bytes + NEW.size - OLD.size; END""",
+    """CREATE TRIGGER IF NOT EXISTS prediction_cache_deleted AFTER DELETE ON prediction_cache
+       BEGIN UPDATE prediction_cache_size SET bytes = bytes - OLD.size; END""",
+    # Caches created before the size table start from their current contents
+    "INSERT OR IGNORE INTO prediction_cache_size SELECT 0, COALESCE(SUM(size), 0) FROM prediction_cache",
+]
+EVICT_TO = 0.9  # evict down to this fraction of max_bytes, so a full cache does not evict on every put
+
+
+def model_version(model_path, engine="keras"):
+    """Identifies a model artifact by engine, path, size and modification time."""
+    stat = os.stat(model_path)
+    identity = f"{engine}:{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(identity.encode()).hexdigest()[:16]
+
+
+class PredictionCache:
+    """Two-layer (memory LRU + SQLite) cache of MRI predictions for one model version."""
+
+    def __init__(self, path, version, memory_entries=256, max_bytes=64 * 1024 * 1024):
+        self.version = version
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("BEGIN IMMEDIATE")  # another process may be creating the same tables
+        self._db.execute(SCHEMA)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_prediction_cache_last_used ON prediction_cache (last_used)")
+        for statement in SIZE_SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    def key(self, data):
+        digest = hashlib.sha256(self.version.encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, data):
+        """Returns (class_index, probabilities) for previously seen bytes, or None."""
+        key = self.key(data)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            row = self._db.execute(
+                "SELECT class_index, probabilities FROM prediction_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE prediction_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            value = (row[0], np.frombuffer(row[1], dtype=np.float32))
+            self._remember(key, value)
+            return value
+
+    def put(self, data, class_index, probabilities):
+        key = self.key(data)
+        blob = np.asarray(probabilities, dtype=np.float32).tobytes()
+        value = (int(class_index), np.frombuffer(blob, dtype=np.float32))
+        size = len(key) + len(blob)
+        with self._lock:
+            self._remember(key, value)
+            self._db.execute(  # an upsert, so the update trigger sees a replaced row (REPLACE skips delete triggers)
+                "INSERT INTO prediction_cache VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                "class_index = excluded.class_index, probabilities = excluded.probabilities, "
+                "size = excluded.size, last_used = excluded.last_used",
+                (key, self.version, value[0], blob, size, time.time()),
+            )
+            self._evict()
+            self._db.commit()
+
+    def get_or_compute(self, data, compute):
+        """Returns the cached prediction for ``data`` or stores ``compute()`` -> (class_index, probabilities)."""
+        cached = self.get(data)
+        if cached is not None:
+            return cached
+        class_index, probabilities = compute()
+        self.put(data, class_index, probabilities)
+        return int(class_index), probabilities
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def size(self):
+        """Bytes stored in the table by every process sharing it."""
+        return self._db.execute("SELECT bytes FROM prediction_cache_size").fetchone()[0]
+
+    def _evict(self):
+        """Drops least recently used rows, of any model version, once the table outgrows ``max_bytes``."""
+        size = self.size()
+        if size <= self.max_bytes:
+            return
+        excess = size - int(self.max_bytes * EVICT_TO)
+        rows = self._db.execute("SELECT key, size FROM prediction_cache ORDER BY last_used")
+        doomed = []
+        for key, size in rows:
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._db.executemany("DELETE FROM prediction_cache WHERE key = ?", doomed)
+        for (key,) in doomed:
+            self._memory.pop(key, None)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
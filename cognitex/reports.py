@@ -0,0 +1,178 @@
+"""In-memory PDF patient reports.
+
+The static part of a report (title, field labels, fonts and the precautions
+block) is laid out once per diagnosis branch and kept as a template. Each
+report deep-copies the template and only writes the patient values, then is
+returned as bytes, so nothing touches the working directory and concurrent
+sessions can't overwrite each other.
+
+Usage:
+    python -m cognitex.reports bulk -o reports.zip [--db URL] [--since 2026-10-01] [--until 2026-10-02]
+"""
+import argparse
+import copy
+import re
+import threading
+import zipfile
+
+from fpdf import FPDF
+
+from cognitex.db import DEFAULT_URL, connect
+
+TITLE = "Alzheimer's Disease Prediction Report"
+PATIENT_FIELDS = (("name", "Patient Name"), ("age", "Age"), ("gender", "Gender"), ("contact", "Contact"))
+NO_DEMENTIA = "No Dementia"
+PRECAUTIONS = (
+    "Maintain a daily routine.",
+    "Stay physically and mentally active.",
+    "Follow a healthy diet.",
+    "Engage in social interactions.",
+    "Reduce stress and anxiety.",
+    "Get enough sleep every night.",
+    "Stay hydrated and avoid alcohol.",
+    "Take prescribed medications on time.",
+)
+
+
+# ✅ Templates
+class _Template:
+    """A laid out report with empty value slots at known coordinates."""
+
+    def __init__(self, with_precautions):
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 16)
+        pdf.cell(200, 10, TITLE, ln=True, align="C")
+        pdf.ln(10)
+
+        pdf.set_font("Arial", size=12)
+        self.slots = {}
+        for key, label in PATIENT_FIELDS:
+            self.slots[key] = self._label(pdf, f"{label}: ")
+        pdf.ln(10)
+
+        pdf.set_font("Arial", "B", 14)
+        pdf.cell(200, 10, "Diagnosis:", ln=True)
+        pdf.set_font("Arial", size=12)
+        self.slots["condition"] = self._label(pdf, "Predicted Condition: ")
+        pdf.ln(10)
+
+        if with_precautions:
+            pdf.set_font("Arial", "B", 14)
+            pdf.cell(200, 10, "Precautions:", ln=True)
+            pdf.set_font("Arial", size=12)
+            for precaution in PRECAUTIONS:
+                pdf.multi_cell(0, 8, f"- {precaution}")
+                pdf.set_x(pdf.l_margin)  # fpdf2 leaves the cursor at the right edge
+            pdf.ln(10)
+        else:
+            pdf.cell(200, 10, "Congratulations! No Dementia Detected.", ln=True)
+        self.pdf = pdf
+
+    @staticmethod
+    def _label(pdf, text):
+        """Writes a field label and returns the (x, y) where its value goes."""
+        x, y = pdf.get_x(), pdf.get_y()
+        pdf.cell(200, 10, text, ln=True)
+        return x + pdf.get_string_width(text), y
+
+    def render(self, values):
+        pdf = copy.deepcopy(self.pdf)
+        pdf.set_font("Arial", size=12)
+        for key, (x, y) in self.slots.items():
+            pdf.set_xy(x, y)
+            pdf.cell(0, 10, _latin1(values[key]))
+        return _pdf_bytes(pdf)
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def _template(with_precautions):
+    with _templates_lock:
+        if with_precautions not in _templates:
+            _templates[with_precautions] = _Template(with_precautions)
+        return _templates[with_precautions]
+
+
+def _latin1(value):
+    # The core PDF fonts only cover latin-1
+    return str(value).encode("latin-1", "replace").decode("latin-1")
+
+
+def _pdf_bytes(pdf):
+    # fpdf2 returns a bytearray, PyFPDF 1.7 a latin-1 str
+    output = pdf.output(dest="S")
+    return bytes(output) if isinstance(output, (bytes, bytearray)) else output.encode("latin-1")
+
+
+# ✅ Rendering
+def render_report(patient_name, age, gender, mobile_no, condition):
+    """Renders one patient report and returns the PDF bytes."""
+    values = {"name": patient_name, "age": age, "gender": gender, "contact": mobile_no, "condition": condition}
+    return _template(condition != NO_DEMENTIA).render(values)
+
+
+def report_filename(record, index=None):
+    """Builds a safe file name such as ``42_Jane_Doe.pdf`` for a report in a zip."""
+    prefix = record.get("id", index)
+    name = re.sub(r"[^A-Za-z0-9]+", "_", str(record["name"])).strip("_") or "patient"
+    return f"{prefix}_{name}.pdf" if prefix is not None else f"{name}.pdf"
+
+
+def write_reports_zip(records, fileobj):
+    """Streams one PDF per record into a zip written to ``fileobj`` (path or binary file).
+
+    Each report is rendered, compressed into the archive and released before the
+    next one, so memory stays flat no matter how many patients there are.
+    Records are dicts with name, age, gender, contact and condition keys.
+    """
+    count = 0
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for index, record in enumerate(records):
+            pdf_bytes = render_report(record["name"], record["age"], record["gender"],
+                                      record["contact"], record["condition"])
+            archive.writestr(report_filename(record, index), pdf_bytes)
+            count += 1
+    return count
+
+
+def iter_prediction_records(db, since=None, until=None, chunk_size=500):
+    """Yields predicts rows as report records, fetching them from the database in chunks."""
+    query = "SELECT id, name, age, gender, contact, diagnosis_condition FROM predicts WHERE 1 = 1"
+    params = []
+    if since:
+        query += " AND created_at >= %s"
+        params.append(since)
+    if until:
+        query += " AND created_at < %s"
+        params.append(until)
+    query += " ORDER BY id"
+    columns = ("id", "name", "age", "gender", "contact", "condition")
+    for row in db.iterate(query, params, chunk_size):
+        yield dict(zip(columns, row))
+
+
+# ✅ Command Line Interface
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export patient PDF reports.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bulk = commands.add_parser("bulk", help="Write every matching patient's report into one zip")
+    bulk.add_argument("-o", "--output", default="reports.zip")
+    bulk.add_argument("--db", default=DEFAULT_URL, help="Database URL")
+    bulk.add_argument("--since", default=None, help="Only predictions created at or after this date")
+    bulk.add_argument("--until", default=None, help="Only predictions created before this date")
+    args = parser.parse_args(argv)
+
+    db = connect(args.db)
+    try:
+        count = write_reports_zip(iter_prediction_records(db, args.since, args.until), args.output)
+    finally:
+        db.close()
+    print(f"✅ Wrote {count} report(s) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,35 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# ✅ Startup Timing Report (process-wide, filled in as stages complete)
+PROCESS_START = time.perf_counter()
+_stages = {}
+_lock = threading.Lock()
+
+
+@contextmanager
+def timed(stage):
+    """Records how long a startup stage took the first time it runs."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            _stages.setdefault(stage, elapsed)
+        print(f"⏱️ {stage}: {elapsed * 1000:.0f} ms")
+
+
+def startup_report():
+    """Returns (stage, seconds) pairs in the order the stages completed."""
+    with _lock:
+        return list(_stages.items())
+
+
+def format_report():
+    """Renders the startup report as a markdown table."""
+    rows = ["| Stage | Time (ms) |", "|---|---:|"]
+    rows += [f"| {stage} | {seconds * 1000:.0f} |" for stage, seconds in startup_report()]
+    rows.append(f"| *since process start* | {(time.perf_counter() - PROCESS_START) * 1000:.0f} |")
+    return "\n".join(rows)
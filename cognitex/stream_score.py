@@ -0,0 +1,291 @@
+"""Streams a large ADNI-format CSV or Parquet registry through the tabular classifier.
+
+The input is read in chunks and each chunk is encoded and scored in a worker
+process, with only a few chunks in flight at a time, so memory stays bounded
+whatever the file size. Results are written in input order as soon as each
+chunk finishes: appended to a CSV file, or one part file per chunk in a
+Parquet directory. A small checkpoint next to the output records the
+completed chunks, so ``--resume`` continues after the last completed one
+instead of starting over.
+
+Usage:
+    python -m cognitex.stream_score registry.csv -o scored.csv [--chunk-size 100000] [--workers 4] [--resume]
+    python -m cognitex.stream_score registry.parquet -o scored.parquet --resume
+"""
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from cognitex.tabular import LABEL_COLUMN, MODEL_PATH, TabularModel
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def _is_parquet(path):
+    return path.endswith((".parquet", ".pq")) or os.path.isdir(path)
+
+
+# ✅ Chunked Input
+def read_chunks(path, chunk_size, skip_chunks=0):
+    """Yields DataFrames of at most ``chunk_size`` rows, skipping the first ``skip_chunks``."""
+    if _is_parquet(path):
+        import pyarrow.dataset as ds
+        # A single file or a directory of parts (e.g. this tool's own Parquet output)
+        batches = ds.dataset(path, format="parquet").to_batches(batch_size=chunk_size)
+        for index, batch in enumerate(batches):
+            if index >= skip_chunks:
+                yield batch.to_pandas()
+        return
+    # Skipped rows are dropped by the csv tokenizer instead of being parsed into frames
+    skipped = skip_chunks * chunk_size
+    skip_rows = (lambda row: 0 < row <= skipped) if skipped else None
+    yield from pd.read_csv(path, chunksize=chunk_size, skiprows=skip_rows, low_memory=False)
+
+
+def input_schema(path, frame):
+    """One Arrow schema for every output part, so the parts can be read back as one dataset.
+
+    Parquet input keeps its own schema. For CSV it comes from the first chunk, with integer
+    columns widened to float64 because a later chunk with a missing value would be parsed as float.
+    """
+    import pyarrow as pa
+    if _is_parquet(path):
+        import pyarrow.dataset as ds
+        return ds.dataset(path, format="parquet").schema.remove_metadata()
+    schema = pa.Schema.from_pandas(frame, preserve_index=False).remove_metadata()
+    return pa.schema([pa.field(field.name, pa.float64()) if pa.types.is_integer(field.type) else field
+                      for field in schema])
+
+
+# ✅ Worker Processes
+_model = None
+_buffer = None
+
+
+def _init_worker(model_path):
+    global _model
+    _model = TabularModel.load(model_path)
+
+
+def score_chunk(frame, output_format, schema=None):
+    """Scores one chunk in a worker and serializes it, so the parent process only appends bytes.
+
+    Parquet parts are cast to ``schema`` plus the prediction columns.
+
+    Returns (rows, labelled rows, rows agreeing with the label, header, payload).
+    """
+    global _buffer
+    if _buffer is None or len(_buffer) < len(frame):
+        _buffer = np.empty((len(frame), _model.layout.width), dtype=np.float32)
+    probabilities = _model.predict_proba(frame, out=_buffer)
+    frame["prediction"] = _model.classes[np.argmax(probabilities, axis=1)]
+    for index, label in enumerate(_model.classes):
+        frame[f"p_{label}"] = probabilities[:, index].astype(np.float32)
+
+    labelled = agree = 0
+    if LABEL_COLUMN in frame.columns:
+        known = frame[LABEL_COLUMN].notna().to_numpy()
+        labelled = int(known.sum())
+        agree = int((frame[LABEL_COLUMN].to_numpy()[known] == frame["prediction"].to_numpy()[known]).sum())
+
+    if output_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        scored = [pa.field(name, pa.string() if name == "prediction" else pa.float32())
+                  for name in frame.columns if schema.get_field_index(name) < 0]
+        payload = io.BytesIO()
+        pq.write_table(pa.Table.from_pandas(frame, schema=pa.schema(list(schema) + scored), preserve_index=False),
+                       payload)
+        return len(frame), labelled, agree, b"", payload.getvalue()
+    header = frame.head(0).to_csv(index=False).encode("utf-8")
+    return len(frame), labelled, agree, header, frame.to_csv(index=False, header=False).encode("utf-8")
+
+
+class _InlineExecutor:
+    """Runs chunks in this process when a pool would only add overhead (``--workers 1``)."""
+
+    class _Done:
+        def __init__(self, value):
+            self._value = value
+
+        def result(self):
+            return self._value
+
+    def __init__(self, model_path):
+        _init_worker(model_path)
+
+    def submit(self, fn, *args):
+        return self._Done(fn(*args))
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+# ✅ Incremental Output
+class _Checkpoint:
+    """Completed chunk count plus the output size at that point, rewritten atomically after each chunk."""
+
+    def __init__(self, output, settings):
+        self.path = output.rstrip("/\\") + ".progress.json"
+        self.settings = settings
+        self.chunks = self.rows = self.output_bytes = 0
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("settings") != self.settings:
+            raise ValueError(f"{self.path} was written with different settings; rerun without --resume.")
+        self.chunks, self.rows, self.output_bytes = state["chunks"], state["rows"], state["output_bytes"]
+        return True
+
+    def save(self):
+        state = {"settings": self.settings, "chunks": self.chunks, "rows": self.rows,
+                 "output_bytes": self.output_bytes}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class _CsvOutput:
+    format = "csv"
+
+    def __init__(self, path, checkpoint, resume):
+        self.path = path
+        if resume and os.path.exists(path):
+            with open(path, "r+b") as f:
+                f.truncate(checkpoint.output_bytes)  # drop a chunk that was half written when we stopped
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write(self, header, payload, index):
+        with open(self.path, "ab") as f:
+            if f.tell() == 0:
+                f.write(header)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+
+class _ParquetOutput:
+    format = "parquet"
+
+    def __init__(self, path, checkpoint, resume):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith(".part-"):  # a part that was being written when we stopped
+                os.remove(os.path.join(path, name))
+                continue
+            part = int(name.split("-")[1].split(".")[0]) if name.startswith("part-") else None
+            if part is not None and (not resume or part >= checkpoint.chunks):
+                os.remove(os.path.join(path, name))
+
+    def schema(self):
+        """The schema of the parts already written (when resuming), which the new ones must match."""
+        part = os.path.join(self.path, "part-000000.parquet")
+        if not os.path.exists(part):
+            return None
+        import pyarrow.parquet as pq
+        return pq.read_schema(part).remove_metadata()
+
+    def write(self, header, payload, index):
+        part = os.path.join(self.path, f"part-{index:06d}.parquet")
+        tmp_part = os.path.join(self.path, f".part-{index:06d}.parquet.tmp")  # hidden from dataset readers
+        with open(tmp_part, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_part, part)
+        return 0
+
+
+# ✅ Streaming Scorer
+def stream_score(input_path, output_path, model_path=MODEL_PATH, chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+                 resume=False, log_every=1):
+    """Scores ``input_path`` chunk by chunk into ``output_path`` and returns a summary dict."""
+    workers = workers or os.cpu_count() or 1
+    settings = {"input": os.path.abspath(input_path), "chunk_size": chunk_size,
+                "model": os.path.abspath(model_path), "model_mtime": os.path.getmtime(model_path)}
+    checkpoint = _Checkpoint(output_path, settings)
+    resumed = resume and checkpoint.load()
+    if resumed:
+        print(f"↩️ Resuming after chunk {checkpoint.chunks} ({checkpoint.rows} rows already scored)")
+    output_type = _ParquetOutput if _is_parquet(output_path) else _CsvOutput
+    output = output_type(output_path, checkpoint, resumed)
+
+    executor = (_InlineExecutor(model_path) if workers == 1 else
+                ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path,)))
+    pending = deque()
+    rows = agree = labelled = 0
+    started = time.perf_counter()
+
+    def drain(limit):
+        nonlocal rows, agree, labelled
+        while len(pending) > limit:
+            chunk_rows, chunk_labelled, chunk_agree, header, payload = pending.popleft().result()
+            checkpoint.output_bytes = output.write(header, payload, checkpoint.chunks)
+            checkpoint.chunks += 1
+            checkpoint.rows += chunk_rows
+            checkpoint.save()
+            rows += chunk_rows
+            labelled += chunk_labelled
+            agree += chunk_agree
+            if log_every and checkpoint.chunks % log_every == 0:
+                elapsed = time.perf_counter() - started
+                print(f"✅ chunk {checkpoint.chunks}: {checkpoint.rows} rows, {rows / elapsed:,.0f} rows/s")
+
+    schema = output.schema() if output.format == "parquet" else None
+    try:
+        for frame in read_chunks(input_path, chunk_size, checkpoint.chunks):
+            if output.format == "parquet" and schema is None:
+                schema = input_schema(input_path, frame)
+            pending.append(executor.submit(score_chunk, frame, output.format, schema))
+            drain(workers * 2 - 1)  # keeps at most two chunks per worker in memory
+        drain(0)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    checkpoint.remove()
+    summary = {"rows": checkpoint.rows, "chunks": checkpoint.chunks, "seconds": elapsed,
+               "rows_per_second": rows / elapsed if elapsed else 0.0}
+    if labelled:
+        summary["label_agreement"] = agree / labelled
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a large ADNI-format CSV/Parquet registry in chunks.")
+    parser.add_argument("input", help="CSV file, Parquet file or Parquet directory")
+    parser.add_argument("-o", "--output", required=True, help="CSV file, or a path ending in .parquet for a directory of Parquet parts")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--resume", action="store_true", help="Continue after the last completed chunk")
+    args = parser.parse_args(argv)
+
+    summary = stream_score(args.input, args.output, args.model, args.chunk_size, args.workers, args.resume)
+    line = (f"✅ Scored {summary['rows']} rows in {summary['chunks']} chunks, "
+            f"{summary['rows_per_second']:,.0f} rows/s")
+    if "label_agreement" in summary:
+        line += f", {summary['label_agreement']:.2%} agree with {LABEL_COLUMN}"
+    print(f"{line} -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
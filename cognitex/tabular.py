@@ -0,0 +1,216 @@
+"""Tabular ADNI classifier (AGE, MMSE, APOE genotype, demographics -> AD / LMCI / CN).
+
+Records are encoded into a fixed one-hot layout built from the category lists
+below, the same columns ``pd.get_dummies`` produced in the notebooks. Encoding
+is vectorized: each column is written into a preallocated float32 matrix
+through precomputed column indexes, so scoring thousands of records is a
+handful of NumPy operations and one ``predict_proba`` call.
+
+Usage:
+    python -m cognitex.tabular train [--data CSV] [-o model/adni_tabular.joblib]
+    python -m cognitex.tabular score patients.csv -o predictions.csv [--model PATH]
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+DATA_PATH = "data/ADNI_Training_Q3_APOE_CollectionADNI1Complete 1Yr 1.5T_July22.2014.csv"
+MODEL_PATH = "model/adni_tabular.joblib"
+LABEL_COLUMN = "DX.bl"
+CLASSES = ("AD", "LMCI", "CN")
+
+# ✅ One-hot Column Layouts (re-exported by config.py)
+APOE_CATEGORIES = ['APOE Genotype_2,2', 'APOE Genotype_2,3', 'APOE Genotype_2,4',
+                   'APOE Genotype_3,3', 'APOE Genotype_3,4', 'APOE Genotype_4,4']
+PTHETHCAT_CATEGORIES = ['PTETHCAT_Hisp/Latino', 'PTETHCAT_Not Hisp/Latino', 'PTETHCAT_Unknown']
+IMPUTED_CATEGORIES = ['imputed_genotype_True', 'imputed_genotype_False']
+PTRACCAT_CATEGORIES = ['PTRACCAT_Asian', 'PTRACCAT_Black', 'PTRACCAT_White']
+PTGENDER_CATEGORIES = ['PTGENDER_Female', 'PTGENDER_Male']
+APOE4_CATEGORIES = ['APOE4_0', 'APOE4_1', 'APOE4_2']
+
+NUMERIC_FEATURES = ("AGE", "PTEDUCAT", "MMSE")
+CATEGORICAL_FEATURES = (
+    ("PTGENDER", PTGENDER_CATEGORIES),
+    ("PTETHCAT", PTHETHCAT_CATEGORIES),
+    ("PTRACCAT", PTRACCAT_CATEGORIES),
+    ("APOE4", APOE4_CATEGORIES),
+    ("imputed_genotype", IMPUTED_CATEGORIES),
+    ("APOE Genotype", APOE_CATEGORIES),
+)
+INPUT_COLUMNS = NUMERIC_FEATURES + tuple(name for name, _ in CATEGORICAL_FEATURES)
+
+
+class FeatureLayout:
+    """Column order of the model matrix and where each feature value lands in it."""
+
+    def __init__(self, numeric=NUMERIC_FEATURES, categorical=CATEGORICAL_FEATURES):
+        self.numeric = tuple(numeric)
+        self.columns = list(self.numeric)
+        self.categorical = []  # (feature, category values, index of the first one-hot column)
+        for feature, dummies in categorical:
+            prefix = f"{feature}_"
+            values = [dummy[len(prefix):] for dummy in dummies]
+            self.categorical.append((feature, pd.Index(values), len(self.columns)))
+            self.columns.extend(dummies)
+        self.width = len(self.columns)
+
+    def encode(self, frame, out=None):
+        """Encodes a DataFrame of raw records into ``out`` (allocated if None) and returns it.
+
+        Unknown categories leave their one-hot block empty and missing numbers
+        stay NaN for the pipeline's imputer.
+        """
+        missing = [column for column in INPUT_COLUMNS if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        rows = len(frame)
+        if out is None:
+            out = np.zeros((rows, self.width), dtype=np.float32)
+        else:
+            out = out[:rows]
+            out.fill(0)
+
+        for index, feature in enumerate(self.numeric):
+            out[:, index] = pd.to_numeric(frame[feature], errors="coerce").to_numpy(np.float32, na_value=np.nan)
+
+        row_index = np.arange(rows)
+        for feature, values, offset in self.categorical:
+            codes = values.get_indexer(_category_keys(feature, frame[feature]))
+            hit = codes >= 0
+            out[row_index[hit], offset + codes[hit]] = 1.0
+        return out
+
+
+def _category_keys(feature, series):
+    """Normalizes raw values to the spelling used in the one-hot column names."""
+    if feature == "APOE4":
+        numbers = pd.to_numeric(series, errors="coerce").round()
+        return numbers.astype("Int64").astype(str).to_numpy()
+    keys = series.astype(str).str.strip()
+    if feature == "imputed_genotype":
+        return keys.str.capitalize().to_numpy()  # TRUE / true / True -> True
+    if feature == "APOE Genotype":
+        return keys.str.replace(" ", "", regex=False).to_numpy()
+    return keys.to_numpy()
+
+
+LAYOUT = FeatureLayout()
+
+
+def records_frame(records):
+    """Accepts a DataFrame, a list of record dicts or a dict of columns."""
+    return records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+
+
+# ✅ Fitted Model
+class TabularModel:
+    """A fitted scikit-learn pipeline together with the feature layout it was trained on."""
+
+    def __init__(self, pipeline, layout=LAYOUT, metadata=None):
+        self.pipeline = pipeline
+        self.layout = layout
+        self.metadata = metadata or {}
+        self.classes = np.asarray(pipeline.classes_)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        import joblib
+        bundle = joblib.load(path)
+        if list(bundle["columns"]) != LAYOUT.columns:
+            raise ValueError(f"{path} was trained on a different feature layout, retrain it.")
+        return cls(bundle["pipeline"], metadata=bundle.get("metadata"))
+
+    @property
+    def version(self):
+        return self.metadata.get("version")
+
+    def save(self, path=MODEL_PATH):
+        import joblib
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        joblib.dump({"pipeline": self.pipeline, "columns": self.layout.columns, "metadata": self.metadata}, tmp_path)
+        os.replace(tmp_path, path)  # the app may be loading the previous model right now
+        return path
+
+    def predict_proba(self, records, out=None):
+        """Returns an (N, len(classes)) probability matrix for a batch of records."""
+        X = self.layout.encode(records_frame(records), out)
+        if hasattr(self.pipeline, "predict_proba"):
+            return self.pipeline.predict_proba(X)
+        # Margin classifiers such as RidgeClassifier: softmax over the decision function
+        scores = self.pipeline.decision_function(X)
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, records, out=None):
+        """Returns the predicted diagnosis code (AD / LMCI / CN) of each record."""
+        return self.classes[np.argmax(self.predict_proba(records, out), axis=1)]
+
+
+def build_preprocessor():
+    """Median imputation and standard scaling, replacing the notebooks' ad-hoc ``normalize``."""
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    return Pipeline([("impute", SimpleImputer(strategy="median")), ("scale", StandardScaler())])
+
+
+def build_pipeline(classifier=None):
+    """Preprocessing followed by ``classifier`` (the notebooks' multinomial logistic regression by default)."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    classifier = classifier if classifier is not None else LogisticRegression(max_iter=1000)
+    return Pipeline(build_preprocessor().steps + [("classify", classifier)])
+
+
+def load_training_data(path=DATA_PATH):
+    """Reads the ADNI csv and returns (encoded matrix, labels), dropping incomplete rows like the notebooks."""
+    data = pd.read_csv(path).dropna(subset=list(INPUT_COLUMNS) + [LABEL_COLUMN])
+    return LAYOUT.encode(data), data[LABEL_COLUMN].to_numpy()
+
+
+def train(data_path=DATA_PATH, model_path=MODEL_PATH, test_size=0.2, random_state=123):
+    """Fits the pipeline, saves it with joblib and returns the held-out accuracy."""
+    from sklearn.model_selection import train_test_split
+
+    X, y = load_training_data(data_path)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state,
+                                                        stratify=y)
+    pipeline = build_pipeline().fit(X_train, y_train)
+    accuracy = float(pipeline.score(X_test, y_test))
+    TabularModel(pipeline.fit(X, y)).save(model_path)  # final model sees every row
+    return accuracy
+
+
+# ✅ Command Line Interface
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train or run the tabular ADNI classifier.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train_cmd = commands.add_parser("train", help="Fit the classifier on the ADNI csv")
+    train_cmd.add_argument("--data", default=DATA_PATH)
+    train_cmd.add_argument("-o", "--output", default=MODEL_PATH)
+
+    score = commands.add_parser("score", help="Add a prediction column to a csv of patient records")
+    score.add_argument("input")
+    score.add_argument("-o", "--output", default="tabular_predictions.csv")
+    score.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        accuracy = train(args.data, args.output)
+        print(f"✅ Saved {args.output} (held-out accuracy {accuracy:.2%})")
+        return 0
+
+    model = TabularModel.load(args.model)
+    frame = pd.read_csv(args.input)
+    frame["prediction"] = model.predict(frame)
+    frame.to_csv(args.output, index=False)
+    print(f"✅ Scored {len(frame)} record(s) into {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
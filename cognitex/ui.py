@@ -0,0 +1,39 @@
+"""Streamlit helpers that keep reruns cheap.
+
+``inject_once`` sends static markup (the stylesheet, the background video) to
+the browser once per session. A zero-height component copies it into the
+parent page, where it outlives the component, so later reruns send nothing.
+``fragment`` reruns an interactive section on its own on Streamlit versions
+with ``st.fragment``. On older ones (the pinned 1.27) it is a plain call, and
+forms keep typing in a section from rerunning the script.
+"""
+import json
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+_INJECT = """<script>
+const doc = window.parent.document;
+if (!doc.getElementById({id})) {{
+    const holder = doc.createElement("div");
+    holder.id = {id};
+    holder.innerHTML = {markup};
+    doc.body.appendChild(holder);
+}}
+</script>"""
+
+
+def fragment(func):
+    """``st.fragment`` (or ``st.experimental_fragment``) where available, otherwise ``func`` unchanged."""
+    decorator = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    return decorator(func) if decorator is not None else func
+
+
+def inject_once(key, markup):
+    """Adds ``markup`` to the page the first time this session asks for ``key``; later calls send nothing."""
+    injected = st.session_state.setdefault("_injected_markup", set())
+    if key in injected:
+        return
+    markup = json.dumps(markup).replace("</", "<\\/")  # keep a literal </script> from ending the script early
+    components.html(_INJECT.format(id=json.dumps(f"cognitex-{key}"), markup=markup), height=0)
+    injected.add(key)
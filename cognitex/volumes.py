@@ -0,0 +1,232 @@
+"""Volumetric MRI input: NIfTI files and DICOM series scored slice by slice.
+
+Volumes are never loaded whole. An uncompressed NIfTI file is memory-mapped
+by nibabel (a .nii.gz is decompressed as a stream only up to the slices it
+needs). A DICOM series is sorted from its headers alone, so only the selected
+slices' pixel data is ever decoded. Evenly spaced axial slices from the
+central band of the brain (where the 2D training scans come from) are
+windowed to the volume's 1st-99th intensity percentiles. They are then
+batched through the existing 2D model, and the per-slice probabilities are
+averaged into one patient-level condition.
+
+Needs ``nibabel`` for NIfTI and ``pydicom`` for DICOM.
+
+Usage:
+    python -m cognitex.volumes VOLUME [VOLUME ...] [--engine keras] [--model PATH] [--slices 16]
+
+VOLUME is a .nii/.nii.gz file, a directory of DICOM files or a .zip of one DICOM series.
+"""
+import argparse
+import os
+import zipfile
+from collections import Counter, namedtuple
+
+import numpy as np
+from PIL import Image
+
+from cognitex.mri import IMAGE_SIZE, ScanRejected, condition_label, preprocess_into
+
+VOLUME_SUFFIXES = (".nii", ".nii.gz", ".zip")
+SLICES = 16
+AXIAL_BAND = (0.35, 0.70)  # fraction of the inferior-superior extent around the ventricles
+MIN_FOREGROUND = 0.15  # slices with less brain than this are skipped
+
+VolumePrediction = namedtuple("VolumePrediction", "class_index probabilities slices agreement")
+
+
+def is_volume(filename):
+    return str(filename).lower().endswith(VOLUME_SUFFIXES)
+
+
+# ✅ Volume Readers
+class NiftiVolume:
+    """Axial slices of a NIfTI image, read through nibabel's array proxy (memory-mapped when uncompressed)."""
+
+    def __init__(self, path):
+        import nibabel as nib
+        try:
+            self._image = nib.load(path, mmap=True)
+        except (nib.filebasedimages.ImageFileError, OSError, EOFError) as err:
+            raise ScanRejected(f"Not a readable NIfTI volume: {err}") from err
+        shape = self._image.shape
+        if len(shape) not in (3, 4):
+            raise ScanRejected(f"Expected a 3D volume, got shape {shape}.")
+        codes = nib.aff2axcodes(self._image.affine)
+        self._axis = next((i for i, code in enumerate(codes) if code in ("S", "I")), 2)
+        self._inferior_first = codes[self._axis] != "I"
+        self._extra = (0,) if len(shape) == 4 else ()  # first frame of a 4D series
+        self._plane_codes = [code for i, code in enumerate(codes) if i != self._axis]
+        self.axial_count = shape[self._axis]
+
+    def axial_slice(self, k):
+        """Returns slice ``k`` (0 = most inferior) as float32, anterior up and patient right on the left."""
+        index = [slice(None)] * 3
+        index[self._axis] = k if self._inferior_first else self.axial_count - 1 - k
+        plane = np.asarray(self._image.dataobj[tuple(index) + self._extra], dtype=np.float32)
+        rows, cols = self._plane_codes
+        if rows in ("L", "R"):
+            plane, rows, cols = plane.T, cols, rows
+        if rows == "A":
+            plane = plane[::-1]
+        if cols == "R":
+            plane = plane[:, ::-1]
+        return plane
+
+    def close(self):
+        self._image.uncache()
+
+
+class DicomSeries:
+    """Axial slices of one DICOM series; headers are read up front, pixel data per selected slice."""
+
+    def __init__(self, open_file, names):
+        import pydicom
+        from pydicom.errors import InvalidDicomError
+        self._pydicom = pydicom
+        self._open_file = open_file
+        headers = []
+        for name in names:
+            try:
+                with open_file(name) as f:
+                    header = pydicom.dcmread(f, stop_before_pixels=True)
+            except (InvalidDicomError, OSError):
+                continue
+            if "PixelData" in header or getattr(header, "Rows", None):
+                headers.append((name, header))
+        if not headers:
+            raise ScanRejected("No DICOM images found.")
+
+        # Several series can share a folder; keep the one with the most slices
+        series = Counter(getattr(h, "SeriesInstanceUID", None) for _, h in headers).most_common(1)[0][0]
+        headers = [(name, h) for name, h in headers if getattr(h, "SeriesInstanceUID", None) == series]
+        orientation = getattr(headers[0][1], "ImageOrientationPatient", None)
+        if orientation is not None:
+            normal = np.cross(np.asarray(orientation[:3], dtype=float), np.asarray(orientation[3:], dtype=float))
+            if abs(normal[2]) < max(abs(normal[0]), abs(normal[1])):
+                raise ScanRejected("The DICOM series is not axial; export an axial series or a NIfTI volume.")
+            headers.sort(key=lambda item: float(np.dot(np.asarray(item[1].ImagePositionPatient, dtype=float), normal))
+                         * np.sign(normal[2]))
+        else:
+            headers.sort(key=lambda item: int(getattr(item[1], "InstanceNumber", 0)))
+        self._names = [name for name, _ in headers]
+        self.axial_count = len(self._names)
+
+    @classmethod
+    def from_directory(cls, path):
+        names = sorted(os.path.join(path, name) for name in os.listdir(path)
+                       if os.path.isfile(os.path.join(path, name)))
+        return cls(lambda name: open(name, "rb"), names)
+
+    @classmethod
+    def from_zip(cls, path):
+        archive = zipfile.ZipFile(path)
+        names = [info.filename for info in archive.infolist() if not info.is_dir()]
+        series = cls(archive.open, names)
+        series._archive = archive
+        return series
+
+    def axial_slice(self, k):
+        """Returns slice ``k`` (0 = most inferior) as float32 in stored display orientation."""
+        with self._open_file(self._names[k]) as f:
+            dataset = self._pydicom.dcmread(f)
+        plane = dataset.pixel_array.astype(np.float32)
+        if plane.ndim == 3:  # multi-frame or colour; keep the first frame/channel
+            plane = plane[0] if plane.shape[-1] not in (3, 4) else plane[..., 0]
+        slope = float(getattr(dataset, "RescaleSlope", 1) or 1)
+        intercept = float(getattr(dataset, "RescaleIntercept", 0) or 0)
+        return plane * slope + intercept
+
+    def close(self):
+        archive = getattr(self, "_archive", None)
+        if archive is not None:
+            archive.close()
+
+
+def open_volume(path):
+    """Opens a NIfTI file, a DICOM directory or a zipped DICOM series."""
+    lower = str(path).lower()
+    if lower.endswith((".nii", ".nii.gz")):
+        return NiftiVolume(path)
+    if os.path.isdir(path):
+        return DicomSeries.from_directory(path)
+    if lower.endswith(".zip"):
+        try:
+            return DicomSeries.from_zip(path)
+        except zipfile.BadZipFile as err:
+            raise ScanRejected(f"Not a readable zip archive: {err}") from err
+    raise ScanRejected(f"Unsupported volume {os.path.basename(str(path))}, use .nii, .nii.gz or zipped DICOM.")
+
+
+# ✅ Slice Selection and Scoring
+def select_slices(volume, count=SLICES, band=AXIAL_BAND):
+    """Reads up to ``count`` evenly spaced slices of the central axial band and drops near-empty ones."""
+    n = volume.axial_count
+    low, high = int(n * band[0]), max(int(n * band[0]) + 1, int(np.ceil(n * band[1])))
+    indexes = np.unique(np.linspace(low, min(high, n) - 1, count).round().astype(int))
+    planes = [volume.axial_slice(int(k)) for k in indexes]
+
+    peak = np.percentile(np.concatenate([p.ravel() for p in planes]), 99)
+    kept = [p for p in planes if np.mean(p > 0.1 * peak) >= MIN_FOREGROUND]
+    return kept or planes
+
+
+def slices_to_batch(planes, out=None):
+    """Windows slices to the shared 1st-99th percentile range and preprocesses them like 2D scans."""
+    values = np.concatenate([p.ravel() for p in planes])
+    low, high = np.percentile(values, (1, 99))
+    scale = 255.0 / (high - low) if high > low else 0.0
+    if out is None:
+        out = np.empty((len(planes),) + IMAGE_SIZE + (3,), dtype=np.float32)
+    for plane, target in zip(planes, out):
+        pixels = np.clip((plane - low) * scale, 0, 255).astype(np.uint8)
+        preprocess_into(Image.fromarray(np.ascontiguousarray(pixels), "L"), target)
+    return out
+
+
+def predict_volume(volume, backend, slices=SLICES, batch_size=32):
+    """Scores the selected slices and averages their probabilities into one VolumePrediction."""
+    batch = slices_to_batch(select_slices(volume, slices))
+    probabilities = np.concatenate([backend.predict(batch[start:start + batch_size])
+                                    for start in range(0, len(batch), batch_size)])
+    mean = probabilities.mean(axis=0)
+    class_index = int(np.argmax(mean))
+    agreement = float(np.mean(np.argmax(probabilities, axis=1) == class_index))
+    return VolumePrediction(class_index, mean, len(batch), agreement)
+
+
+def score_volume(path, backend, slices=SLICES):
+    volume = open_volume(path)
+    try:
+        return predict_volume(volume, backend, slices)
+    finally:
+        volume.close()
+
+
+# ✅ Command Line Interface
+def main(argv=None):
+    from cognitex.inference import ENGINES, load_backend
+
+    parser = argparse.ArgumentParser(description="Score NIfTI volumes or DICOM series with the MRI model.")
+    parser.add_argument("volumes", nargs="+")
+    parser.add_argument("--engine", choices=tuple(ENGINES), default="keras")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--slices", type=int, default=SLICES, help="Axial slices scored per volume")
+    args = parser.parse_args(argv)
+
+    backend = load_backend(args.engine, args.model)
+    failed = 0
+    for path in args.volumes:
+        try:
+            result = score_volume(path, backend, args.slices)
+        except ScanRejected as err:
+            print(f"❌ {path}: {err}")
+            failed += 1
+            continue
+        print(f"✅ {path}: {condition_label(result.class_index)} "
+              f"({result.probabilities[result.class_index]:.0%}, {result.slices} slices, "
+              f"{result.agreement:.0%} agree)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+import atexit
+import queue
+import threading
+import time
+
+from cognitex.db import DatabaseError
+from cognitex.history import record_visit
+from cognitex.metrics import trace
+
+# ✅ Write-behind Persistence
+# Prediction records go into a bounded queue and a background thread inserts
+# them in batched transactions, so the Predict page never waits on the database.
+# Rows are ``write_row``'s arguments after (db, cursor): for ``record_visit``,
+# (name, age, gender, contact, condition, source, scan, model_version), where the
+# trailing fields may be left off. Each becomes a patient visit.
+
+
+class PredictionWriter:
+    """Background writer that batches queued rows into single transactions with retries."""
+
+    def __init__(self, db, write_row=record_visit, max_queue=1000, batch_size=50,
+                 flush_interval=0.5, max_retries=3, retry_delay=0.5):
+        self.db = db
+        self.write_row = write_row
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.written = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="prediction-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, row, timeout=1.0):
+        """Queues one row, e.g. (name, age, gender, contact, condition, source, scan, model_version).
+
+        Returns False if the queue stayed full for ``timeout``.
+        """
+        try:
+            self._queue.put(row, timeout=timeout)
+            return True
+        except queue.Full:
+            return False
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _take_batch(self):
+        try:
+            rows = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(rows) < self.batch_size:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write(self, rows):
+        """Inserts rows in one transaction. Rows that are rejected are skipped and logged.
+
+        Returns (written, rejected); the counts only stand if the transaction commits.
+        """
+        written = rejected = 0
+        with trace("db_write_batch"), self.db.cursor() as cursor:
+            for row in rows:
+                try:
+                    self.write_row(self.db, cursor, *row)
+                    written += 1
+                except self.db.integrity_errors + (ValueError, TypeError) as err:  # e.g. a value too long
+                    rejected += 1
+                    print("❌ Error inserting record:", err)
+        return written, rejected
+
+    def _write_with_retries(self, rows):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                written, rejected = self._write(rows)
+            except DatabaseError as err:
+                print(f"⚠️ Writing {len(rows)} record(s) failed (attempt {attempt}/{self.max_retries}): {err}")
+                time.sleep(self.retry_delay * attempt)
+                continue
+            self.written += written
+            self.failed += rejected
+            return
+        self.failed += len(rows)
+        print(f"❌ Dropped {len(rows)} record(s) after {self.max_retries} attempts.")
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            rows = self._take_batch()
+            if not rows:
+                continue
+            try:
+                self._write_with_retries(rows)
+            except Exception as err:  # anything unexpected drops this batch, never the writer thread
+                self.failed += len(rows)
+                print(f"❌ Dropped {len(rows)} record(s): {type(err).__name__}: {err}")
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Blocks until every queued row has been written or dropped."""
+        self._queue.join()
+
+    def close(self):
+        """Flushes the queue and stops the writer thread."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
@@ -1,6 +1,10 @@
-import os
-import base64
+import importlib
+import time
 import streamlit as st
+from cognitex.startup import timed, format_report
+from cognitex.metrics import REGISTRY, start_metrics_file, start_metrics_server
+
+rerun_started = time.perf_counter()
 
 # ✅ Set Page Configuration
 st.set_page_config(
@@ -9,107 +13,56 @@ st.set_page_config(
     layout="wide"
 )
 
-# ✅ Import Other Pages
-from streamlit_pages._home_page import home_page
-from streamlit_pages._predict_alzheimer import prediction_page
-from streamlit_pages._latest_news import news_page  
-from streamlit_pages._chat_page import chat_bot
-
-
-import sqlite3
-
-# Connect to SQLite (or create it)
-conn = sqlite3.connect("patients.db")
-cursor = conn.cursor()
-
-# Create table if not exists
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS patients (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    age INTEGER NOT NULL,
-    gender TEXT NOT NULL,
-    contact TEXT NOT NULL,
-    condition TEXT NOT NULL,
-    image_path TEXT
-)
-''')
-
-conn.commit()
-
-# ✅ Set Background Video
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))  
-ASSETS_DIR = os.path.join(BASE_DIR, "assets")
-BACKGROUND_VIDEO = os.path.join(ASSETS_DIR, "videos", "background.mp4")
-
-
-def set_background_video(video_file):
-    """Embed an MP4 video in the background."""
-    if os.path.exists(video_file):
-        video_base64 = get_base64_of_video(video_file)
-        video_html = f"""
-        <video autoplay loop muted playsinline class="background-video">
-            <source src="data:video/mp4;base64,{video_base64}" type="video/mp4">
-        </video>
-        <style>
-        .background-video {{
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100vw;
-            height: 100vh;
-            object-fit: cover;
-            z-index: -1;
-        }}
-        </style>
-        """
-        st.markdown(video_html, unsafe_allow_html=True)
-
-
-@st.cache_data()
-def get_base64_of_video(video_path):
-    """Convert a video file to base64 encoding."""
-    try:
-        with open(video_path, "rb") as file:
-            return base64.b64encode(file.read()).decode("utf-8")
-    except FileNotFoundError:
-        st.error(f"🚨 Background video not found at: {video_path}")
-        return ""
-
-
-set_background_video(BACKGROUND_VIDEO)  # ✅ Set Background Video
-
-# ✅ Horizontal Navigation Bar (Moved from Sidebar)
-st.markdown("""
-    <style>
-        .navbar-container {
-            display: flex;
-            justify-content: center;
-            gap: 20px;
-            padding: 12px;
-            background: rgba(255, 255, 255, 0.3);
-            border-radius: 12px;
-            margin-bottom: 20px;
-        }
-        .navbar-button {
-            font-size: 18px;
-            font-weight: bold;
-            padding: 10px 18px;
-            border-radius: 8px;
-            background: linear-gradient(135deg, #6e8efb, #a777e3);
-            color: white;
-            border: none;
-            cursor: pointer;
-            transition: background 0.3s ease;
-        }
-        .navbar-button:hover {
-            background: linear-gradient(135deg, #5a7ceb, #9a64d7);
-        }
-    </style>
-""", unsafe_allow_html=True)
+# config writes to the page, so it is imported after set_page_config
+from config import apply_styles, set_background_video, METRICS_PORT, METRICS_FILE, METRICS_FILE_INTERVAL
+
+# ✅ Pages are imported the first time they are shown, so heavy dependencies
+# (TensorFlow, MySQL, hugchat) never load for users who only read the Home page
+PAGES = {
+    "Home": ("streamlit_pages._home_page", "home_page"),
+    "Predict Alzheimer's": ("streamlit_pages._predict_alzheimer", "prediction_page"),
+    "ChatBot": ("streamlit_pages._chat_page", "chat_bot"),
+    "Latest News": ("streamlit_pages._latest_news", "news_page"),
+    "Patient History": ("streamlit_pages._history_page", "history_page"),
+    "Admin": ("streamlit_pages._admin_page", "admin_page"),
+}
+
+
+@st.cache_resource(show_spinner=False)
+def load_page(page):
+    """Imports a page module once per process and returns its render function."""
+    module_name, function_name = PAGES[page]
+    with timed(f"import {module_name}"):
+        module = importlib.import_module(module_name)
+    return getattr(module, function_name)
+
+
+
+# ✅ Metrics Export (started once per process)
+@st.cache_resource(show_spinner=False)
+def start_metrics_export(port, path, interval):
+    """Starts the configured exporters; a failure is logged once and the app keeps serving without it."""
+    if port:
+        try:
+            start_metrics_server(int(port))
+        except OSError as err:  # e.g. another Streamlit process on this node already serves the port
+            print(f"⚠️ Metrics server not started on port {port}: {err}")
+    if path:
+        try:
+            start_metrics_file(path, interval)
+        except OSError as err:
+            print(f"⚠️ Metrics file export not started for {path}: {err}")
+    return True
+
+
+start_metrics_export(METRICS_PORT, METRICS_FILE, METRICS_FILE_INTERVAL)
+
+# ✅ Stylesheet and Background Video (sent once per session, they stay in the page across reruns)
+apply_styles()
+set_background_video()
 
 # ✅ Create Navigation Buttons (Top Navbar)
-col1, col2, col3, col4, col5 = st.columns(5)
+col1, col2, col3, col4, col5, col6 = st.columns(6)
 
 with col1:
     if st.button("🏠 Home", key="home"):
@@ -127,6 +80,14 @@ with col4:
     if st.button("📰 News", key="news"):
         st.session_state["page"] = "Latest News"
 
+with col5:
+    if st.button("🗂️ History", key="history"):
+        st.session_state["page"] = "Patient History"
+
+with col6:
+    if st.button("📊 Admin", key="admin"):
+        st.session_state["page"] = "Admin"
+
 
 
 # ✅ Store Page Selection
@@ -134,14 +95,9 @@ if "page" not in st.session_state:
     st.session_state["page"] = "Home"
 
 # ✅ Display the Selected Page
-if st.session_state["page"] == "Home":
-    home_page()
-elif st.session_state["page"] == "Predict Alzheimer's":
-    prediction_page()
-elif st.session_state["page"] == "ChatBot":
-    chat_bot()
-elif st.session_state["page"] == "Latest News":
-    news_page()
+page_started = time.perf_counter()
+load_page(st.session_state["page"])()
+page_seconds = time.perf_counter() - page_started
 
 
 # ✅ Sidebar (Only for Logo, Disclaimer, and Contact)
@@ -155,15 +111,13 @@ The predictions provided by this system are for informational purposes only. Con
 ### Contact
 For inquiries, mail us [here](mailto:arpitsengar99@gmail.com).
 """)
-st.markdown("""
-    <style>
-        /* Sidebar Styling */
-        [data-testid="stSidebar"] {
-            background: rgba(255, 255, 255, 0.2);  /* Adjust the opacity here */
-            backdrop-filter: blur(10px); /* Adds a slight blur effect */
-            padding: 20px;
-            border-radius: 15px;
-        }
-    </style>
-""", unsafe_allow_html=True)
 
+# ✅ Startup Timing Report
+with st.sidebar.expander("⏱️ Startup Report"):
+    st.markdown(format_report())
+
+# ✅ Rerun Timing (recorded as the "rerun" stage on the Admin page)
+rerun_seconds = time.perf_counter() - rerun_started
+REGISTRY.observe("rerun", rerun_seconds)
+st.sidebar.caption(f"⏱️ This rerun: {rerun_seconds * 1000:.0f} ms "
+                   f"({st.session_state['page']} {page_seconds * 1000:.0f} ms)")
@@ -0,0 +1,126 @@
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import streamlit as st
+from cognitex.db import DatabaseError
+from cognitex.export import FORMATS, export_predictions, load_state, save_state
+from cognitex.metrics import prometheus_text, summary
+from cognitex.startup import format_report
+from config import ADMIN_PASSWORD, METRICS_PORT, METRICS_FILE, EXPORT_DIR, EXPORT_DOWNLOAD_MAX_MB
+
+EXPORT_STATE = os.path.join(EXPORT_DIR, "predicts.state.json")
+
+
+def admin_unlocked():
+    """Asks for ADMIN_PASSWORD once per session; without one the page stays disabled."""
+    if not ADMIN_PASSWORD:
+        st.error("⚠️ This page is disabled. Set ADMIN_PASSWORD in .streamlit/secrets.toml to enable it.")
+        return False
+    if st.session_state.get("admin_unlocked"):
+        return True
+    password = st.text_input("Admin Password", type="password")
+    if password and hmac.compare_digest(password.encode(), str(ADMIN_PASSWORD).encode()):
+        st.session_state["admin_unlocked"] = True
+        return True
+    if password:
+        st.error("⚠️ Wrong password.")
+    return False
+
+
+def admin_page():
+    """Per-stage request timings for this server process."""
+    st.title("📊 Admin")
+    if not admin_unlocked():
+        return
+
+    st.subheader("Request Stages")
+    st.caption("Timings recorded by this process since it started; percentiles cover the latest 1024 samples per stage.")
+    rows = summary()
+    if rows:
+        st.dataframe(
+            [{"Stage": row["stage"], "Count": row["count"], "Errors": row["errors"],
+              "Mean (ms)": round(row["mean_ms"], 1), "p50 (ms)": round(row["p50_ms"], 1),
+              "p95 (ms)": round(row["p95_ms"], 1), "p99 (ms)": round(row["p99_ms"], 1)} for row in rows],
+            use_container_width=True, hide_index=True)
+    else:
+        st.info("No requests have been timed yet.")
+    if st.button("🔄 Refresh"):
+        st.rerun()
+
+    st.subheader("Prometheus Export")
+    if METRICS_PORT:
+        st.write(f"Scrape `http://<host>:{METRICS_PORT}/metrics`.")
+    if METRICS_FILE:
+        st.write(f"Written to `{METRICS_FILE}` for the node_exporter textfile collector.")
+    text = prometheus_text()
+    st.download_button("📄 Download metrics.prom", text, "metrics.prom", "text/plain")
+    with st.expander("Raw metrics"):
+        st.code(text, language="text")
+
+    export_section()
+
+    st.subheader("Startup")
+    st.markdown(format_report())
+
+
+@st.cache_resource(show_spinner=False)
+def get_export_pool():
+    """One export at a time per process, off the script run."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+
+
+def _run_export(db, path, fmt, since_id, with_images, with_model, progress):
+    result = export_predictions(db, path, fmt, since_id, None, with_images, with_model,
+                                progress=lambda rows, last_id: progress.update(rows=rows))
+    save_state(EXPORT_STATE, result)
+    return result
+
+
+def export_section():
+    """Streams the predicts view to a file under EXPORT_DIR in the background, continuing after the last export.
+
+    The finished file is read into the page only when its download is asked for, not on every rerun.
+    """
+    from streamlit_pages._predict_alzheimer import get_db
+
+    if not admin_unlocked():
+        return
+    st.subheader("Export Predictions")
+    fmt = st.selectbox("Format", FORMATS, index=FORMATS.index("parquet"))
+    since_id = st.number_input("After visit id (0 = everything)", min_value=0, step=1,
+                               value=load_state(EXPORT_STATE) or 0)
+    with_images = st.checkbox("Include scan hash and size")
+    with_model = st.checkbox("Include model version")
+    job = st.session_state.get("admin_export")
+    running = job is not None and not job["future"].done()
+    if st.button("📦 Export", disabled=running):
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        path = os.path.join(EXPORT_DIR, f"predicts-{datetime.now():%Y%m%d%H%M%S}.{fmt}")
+        progress = {"rows": 0}
+        future = get_export_pool().submit(_run_export, get_db(), path, fmt, int(since_id), with_images, with_model, progress)
+        job = st.session_state["admin_export"] = {"future": future, "progress": progress}
+
+    if job is None:
+        return
+    if not job["future"].done():
+        st.info(f"⏳ Exporting... {job['progress']['rows']:,} rows so far.")
+        if st.button("🔄 Check Export"):
+            st.rerun()
+        return
+    try:
+        result = job["future"].result()
+    except (DatabaseError, OSError, ImportError) as err:
+        st.error(f"⚠️ Export failed: {err}")
+        return
+    if not os.path.exists(result.path):
+        return
+    size_mb = os.path.getsize(result.path) / (1024 * 1024)
+    st.success(f"✅ Exported {result.rows:,} rows (ids up to {result.last_id}) to `{result.path}` ({size_mb:.1f} MB).")
+    if size_mb > EXPORT_DOWNLOAD_MAX_MB:
+        st.caption("Too large to download through the browser; copy it from the server or use "
+                   "`python -m cognitex.export`.")
+    elif st.button(f"📄 Prepare {os.path.basename(result.path)}"):
+        with open(result.path, "rb") as f:
+            st.download_button(f"📄 Download {os.path.basename(result.path)}", f,
+                               os.path.basename(result.path), "application/octet-stream")
@@ -1,53 +1,81 @@
 import streamlit as st
-from hugchat import hugchat
-from hugchat.login import Login
-from config import BASE_PROMPT, HF_EMAIL, HF_PASS
+from cognitex.chat import ChatError, make_provider
+from cognitex.chat_memory import ConversationMemory
+from cognitex.metrics import trace
+from config import (BASE_PROMPT, HF_EMAIL, HF_PASS, CHAT_PROVIDER,
+                    CHAT_TOKEN_BUDGET, CHAT_MAX_TURNS, CHAT_RENDER_WINDOW)
 
 
 # Login Credentials
 hf_email = HF_EMAIL
 hf_pass = HF_PASS
 
-flag = 0
+GREETING = "Hi! How may I help you?"
+
+
+@st.cache_resource(show_spinner=False)
+def get_chat_provider(provider_name):
+    """One provider per process, so the HuggingChat login cookies are shared by every session."""
+    return make_provider(provider_name, hf_email, hf_pass)
+
+
+def get_conversation():
+    """Each Streamlit session keeps its own conversation across reruns."""
+    if "conversation" not in st.session_state:
+        st.session_state.conversation = get_chat_provider(CHAT_PROVIDER).new_conversation()
+    return st.session_state.conversation
+
+
+def get_memory():
+    """Each Streamlit session keeps its own bounded history and base prompt state."""
+    if "chat_memory" not in st.session_state:
+        memory = ConversationMemory(BASE_PROMPT, token_budget=CHAT_TOKEN_BUDGET, max_turns=CHAT_MAX_TURNS)
+        memory.add("assistant", GREETING)
+        st.session_state.chat_memory = memory
+    return st.session_state.chat_memory
 
 
 def chat_bot():
 
     # Store LLM generated responses
-    if "messages" not in st.session_state.keys():
-        st.session_state.messages = [{"role": "assistant", "content": "Hi! How may I help you?"}]
+    memory = get_memory()
 
-    # Display chat messages
-    for message in st.session_state.messages:
+    # Display chat messages (only the most recent ones are redrawn)
+    hidden = memory.summarized_turns + max(0, len(memory.turns) - CHAT_RENDER_WINDOW)
+    if hidden:
+        with st.expander(f"{hidden} earlier message(s)"):
+            st.caption(memory.summary or "Scroll-back is limited to the latest messages.")
+    for message in memory.messages(CHAT_RENDER_WINDOW):
         with st.chat_message(message["role"]):
             st.write(message["content"])
 
-    # Function for generating LLM response
-    def generate_response(prompt_input, email, passwd):
-
-        # Hugging Face Login
-        sign = Login(email, passwd)
-        cookies = sign.login()
-        # Create ChatBot                            
-        chatbot = hugchat.ChatBot(cookies=cookies.get_dict())
-
-        global flag
-        if flag<1:
-            flag+=1
-            prompt_input=BASE_PROMPT+prompt_input
-        return str(chatbot.chat(prompt_input)).strip('`')
+    # Function for generating LLM response (streams text chunks)
+    def generate_response(prompt_input):
+        return get_conversation().stream(prompt_input, context=memory.context())
 
     # User-provided prompt
-    if prompt := st.chat_input(disabled=not (hf_email and hf_pass)):
-        st.session_state.messages.append({"role": "user", "content": prompt})
+    if prompt := st.chat_input(disabled=CHAT_PROVIDER == "huggingchat" and not (hf_email and hf_pass)):
+        memory.add("user", prompt)
         with st.chat_message("user"):
             st.write(prompt)
 
     # Generate a new response if last message is not from assistant
-    if st.session_state.messages[-1]["role"] != "assistant":
+    if memory.turns[-1][0] != "assistant":
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = generate_response(prompt, hf_email, hf_pass) 
-                st.write(response) 
-        message = {"role": "assistant", "content": response}
-        st.session_state.messages.append(message)
\ No newline at end of file
+            placeholder = st.empty()
+            response = ""
+            try:
+                with trace("chat_round_trip"):
+                    with st.spinner("Thinking..."), trace("chat_first_token"):
+                        tokens = generate_response(memory.turns[-1][1])
+                        first = next(tokens, "")
+                    response = first
+                    placeholder.markdown(response + "▌")
+                    for token in tokens:
+                        response += token
+                        placeholder.markdown(response + "▌")
+            except ChatError as err:
+                response = response or f"⚠️ {err}"
+            response = response.strip().strip('`')
+            placeholder.write(response)
+        memory.add("assistant", response)
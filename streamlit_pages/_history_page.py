@@ -0,0 +1,71 @@
+import pandas as pd
+import streamlit as st
+from cognitex.db import DatabaseError
+from cognitex.history import search_patients, patient_visits
+from streamlit_pages._admin_page import admin_unlocked
+from streamlit_pages._predict_alzheimer import get_db, get_image_store
+
+# MRI classes from least to most severe, for the condition-over-time chart
+SEVERITY = {"No Dementia": 0, "Very Mild Dementia": 1, "Mild Dementia": 2, "Moderate Dementia": 3}
+
+
+def _search_page(query):
+    """Keeps a stack of keyset cursors per search so Previous/Next never re-scan earlier pages."""
+    if st.session_state.get("history_query") != query:
+        st.session_state["history_query"] = query
+        st.session_state["history_cursors"] = [None]
+    cursors = st.session_state["history_cursors"]
+    return search_patients(get_db(), query, after=cursors[-1]), cursors
+
+
+def history_page():
+    """Look up a patient by name or contact and show their past predictions."""
+    st.title("🗂️ Patient History")
+    if not admin_unlocked():
+        return
+
+    query = st.text_input("Search by name or mobile number", placeholder="e.g. Jane or +9198")
+    try:
+        patients, next_cursor = _search_page(query)
+    except DatabaseError as err:
+        st.error(f"⚠️ Could not search patients: {err}")
+        return
+    cursors = st.session_state["history_cursors"]
+
+    if not patients:
+        st.info("No matching patients.")
+        return
+    options = {f"{p['name']} · {p['contact']} · last visit {str(p['last_visit_at'])[:10]}": p for p in patients}
+    patient = options[st.radio("Patients", list(options), label_visibility="collapsed")]
+
+    col1, col2, _ = st.columns([1, 1, 4])
+    with col1:
+        if len(cursors) > 1 and st.button("⬅️ Previous"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if next_cursor is not None and st.button("Next ➡️"):
+            cursors.append(next_cursor)
+            st.rerun()
+
+    visits, _ = patient_visits(get_db(), patient["id"])
+    st.subheader(f"{patient['name']} ({patient['gender']}, {patient['contact']})")
+    if not visits:
+        st.info("No visits recorded yet.")
+        return
+    frame = pd.DataFrame(visits).rename(columns={"created_at": "Date", "age": "Age",
+                                                 "diagnosis_condition": "Condition", "source": "Source"})
+    st.dataframe(frame[["Date", "Age", "Condition", "Source"]], use_container_width=True, hide_index=True)
+
+    store = get_image_store()
+    thumbnails = [(visit, store.thumbnail_path(visit["image_hash"])) for visit in visits[:6] if visit["image_hash"]]
+    thumbnails = [(visit, path) for visit, path in thumbnails if path]
+    if thumbnails:
+        st.caption("Recent scans")
+        st.image([path for _, path in thumbnails], width=120,
+                 caption=[f"{str(visit['created_at'])[:10]} · {visit['diagnosis_condition']}" for visit, _ in thumbnails])
+
+    trend = frame[frame["Condition"].isin(list(SEVERITY))]
+    if len(trend) > 1:
+        st.caption("Severity over time (0 = No Dementia, 3 = Moderate Dementia)")
+        st.line_chart(trend.assign(Severity=trend["Condition"].map(SEVERITY)).set_index("Date")["Severity"].sort_index())
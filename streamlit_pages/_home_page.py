@@ -1,9 +1,9 @@
+import textwrap
 import streamlit as st
 from config import BANNER
 
-def home_page():
-    
-    st.write("""
+# Static page text, dedented once per process rather than on every rerun
+INTRODUCTION = textwrap.dedent("""
        ## Understanding Alzheimer's Disease
         Alzheimer's disease is a progressive neurodegenerative disorder that affects millions of people worldwide. 
         It primarily impacts memory, cognitive function, and behavior, making daily activities increasingly difficult over time. 
@@ -28,6 +28,11 @@ def home_page():
         
         <br>
                 
-        """, unsafe_allow_html=True)
+        """)
+
+
+def home_page():
+    
+    st.markdown(INTRODUCTION, unsafe_allow_html=True)
 
     st.caption('Finished reading? Navigate to the `Prediction Page` to make some predictions')
\ No newline at end of file
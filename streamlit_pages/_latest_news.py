@@ -1,6 +1,6 @@
 import html
-import requests
 import streamlit as st
+from cognitex.news import NEWS_API_URL, FixtureSource, NewsAPISource, NewsCache, ThumbnailCache, make_session
 
 # -------------------- CONFIGURATION -------------------- #
 
@@ -8,35 +8,36 @@ import streamlit as st
 API_KEY = st.secrets.get("NEWS_API", None)
 KEYWORD = "Alzheimer"  # Replace with any relevant topic
 DEFAULT_IMAGE = "https://via.placeholder.com/400?text=No+Image+Available"  # Placeholder for missing images
+NEWS_FIXTURE = st.secrets.get("NEWS_FIXTURE", None)  # Local JSON file to use instead of NewsAPI
+NEWS_TTL = st.secrets.get("NEWS_TTL", 900)  # Seconds between background refreshes
+NEWS_URL = st.secrets.get("NEWS_API_URL", NEWS_API_URL)  # e.g. a local fixture server for load tests
+THUMBNAIL_DIR = "cache/news_thumbnails"
 
 # Validate API Key
-if not API_KEY:
+if not API_KEY and not NEWS_FIXTURE:
     st.error("🚨 Error: NEWS_API key is missing in `.streamlit/secrets.toml`.")
 
 # -------------------- FETCH NEWS FUNCTION -------------------- #
 
+@st.cache_resource(show_spinner=False)
+def get_news_cache():
+    """Starts the process-wide news feed, refreshed in the background every NEWS_TTL seconds."""
+    session = make_session()
+    source = FixtureSource(NEWS_FIXTURE) if NEWS_FIXTURE else NewsAPISource(API_KEY, KEYWORD, session, url=NEWS_URL)
+    return NewsCache(source, ttl=NEWS_TTL, thumbnails=ThumbnailCache(THUMBNAIL_DIR, session=session))
+
+
 def _get_news():
-    """Fetch news articles from NewsAPI with error handling."""
-    if not API_KEY:
+    """Return cached news articles, reporting the last refresh error if there are none."""
+    if not API_KEY and not NEWS_FIXTURE:
         st.error("⚠️ API key is missing! Please check your `.streamlit/secrets.toml` file.")
         return []
 
-    try:
-        response = requests.get(
-            f'https://newsapi.org/v2/everything?q={KEYWORD}&apiKey={API_KEY}&language=en&searchIn=title'
-        )
-        data = response.json()
-
-        # Handle API errors
-        if response.status_code != 200:
-            st.error(f"❌ API Error {response.status_code}: {data.get('message', 'Unknown error')}")
-            return []
-
-        return data.get('articles', [])
-    
-    except requests.RequestException as e:
-        st.error(f"🌐 Network error: {e}")
-        return []
+    news = get_news_cache()
+    articles = news.get()
+    if not articles and news.last_error:
+        st.error(news.last_error)
+    return articles
 
 # -------------------- DISPLAY NEWS FUNCTION -------------------- #
 
@@ -59,13 +60,12 @@ def news_page():
         author = article.get('author', 'Unknown')
         published_at = article.get('publishedAt', '')[:10]  # Extract only date (YYYY-MM-DD)
 
-        # Use default image if the URL is missing
-        if not urlToImage:
-            urlToImage = DEFAULT_IMAGE
+        # Prefer the local thumbnail, then the remote image, then the placeholder
+        urlToImage = get_news_cache().thumbnails.get(urlToImage) or urlToImage or DEFAULT_IMAGE
 
         # Display article with proper formatting
         st.subheader(title)
-        st.image(urlToImage, use_container_width=True)  # ✅ Fixed deprecated parameter
+        st.image(urlToImage, use_column_width=True)  # use_container_width needs a newer Streamlit than 1.27
         st.write(f"**{description}**")
         st.markdown(f"🔗 [Read more]({url})", unsafe_allow_html=True)
         st.caption(f"🖊️ Author: {author} | 📅 Published on: {published_at}")
@@ -1,36 +1,169 @@
 import os
 import re
 import numpy as np
+import pandas as pd
 import streamlit as st
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from PIL import Image
 import io
-from fpdf import FPDF
-import mysql.connector
-
-# ✅ Connect to MySQL Database
-try:
-    mydb = mysql.connector.connect(
-        host="localhost",
-        user="root",  # Change to your MySQL username
-        password="root",  # Change to your MySQL password
-        database="patient_db"
-    )
-    print("✅ Database connection successful!")
-except mysql.connector.Error as err:
-    st.error(f"❌ Error connecting to database: {err}")
-    exit(1)
-
-mycursor = mydb.cursor()
-
-
-# ✅ Load the Model
-MODEL_PATH = "model/my_model.h5"
-if not os.path.exists(MODEL_PATH):
-    st.error("⚠️ Model file not found! Please check the path.")
-    st.stop()
-model = load_model(MODEL_PATH)
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from cognitex.mri import ScanRejected, open_scan, preprocess_image, condition_label
+from cognitex.inference import DEFAULT_MODEL_PATHS, load_backend
+from cognitex.prediction_cache import PredictionCache, model_version
+from cognitex.inference_server import InferenceClient, MicroBatcher
+from cognitex.model_registry import ModelRegistry, current_version
+from config import (INFERENCE_ENGINE, INFERENCE_MODEL_PATH, INFERENCE_THREADS,
+                    MODEL_REGISTRY_DIR, MODEL_REGISTRY_CHECK_SECONDS,
+                    PREDICTION_CACHE_PATH, PREDICTION_CACHE_MAX_MB,
+                    INFERENCE_SERVER_URL, INFERENCE_MICROBATCH, INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS,
+                    DATABASE_URL, DATABASE_FALLBACK_URL, DATABASE_POOL_SIZE, IMAGE_STORE_DIR,
+                    TABULAR_MODEL_PATH, APOE_CATEGORIES, PTHETHCAT_CATEGORIES, PTRACCAT_CATEGORIES,
+                    ABBREVIATION, CONDITION_DESCRIPTION)
+from cognitex.db import DatabaseError, connect
+from cognitex.history import add_visit
+from cognitex.image_store import ImageStore
+from cognitex.writer import PredictionWriter
+from cognitex.reports import render_report
+from cognitex.startup import timed
+from cognitex.metrics import trace
+from cognitex.tabular import TabularModel
+from cognitex.ui import fragment
+from cognitex.volumes import is_volume, score_volume
+
+# ✅ Connect to the Database (one pool per process; each request borrows its own connection)
+@st.cache_resource(show_spinner=False)
+def get_db():
+    """Opens the database pool the first time it is needed."""
+    with timed("connect database"):
+        db = connect(DATABASE_URL, DATABASE_FALLBACK_URL, DATABASE_POOL_SIZE)
+    print(f"✅ Database connection successful! ({db.dialect})")
+    return db
+
+
+# ✅ Background Work (database writes and PDF reports stay off the request path)
+@st.cache_resource(show_spinner=False)
+def get_writer():
+    """Starts the write-behind queue that batches prediction inserts."""
+    return PredictionWriter(get_db())
+
+
+@st.cache_resource(show_spinner=False)
+def get_image_store():
+    """Opens the content-addressed scan store shared by every session."""
+    return ImageStore(IMAGE_STORE_DIR)
+
+
+@st.cache_resource(show_spinner=False)
+def get_report_pool():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-report")
+
+
+# ✅ Load the Model (once per process, shared by every session)
+@st.cache_resource(show_spinner="Loading model...", max_entries=1)
+def _load_backend(engine, model_path, num_threads, version):
+    """``version`` (path, size and mtime) is part of the key, so a model file replaced in place is reloaded."""
+    with timed(f"load {engine} model"):
+        return load_backend(engine, model_path, num_threads)
+
+
+def _model_path():
+    """Returns the configured model path, stopping the page if the file is missing."""
+    model_path = INFERENCE_MODEL_PATH or DEFAULT_MODEL_PATHS.get(INFERENCE_ENGINE, "")
+    if not os.path.exists(model_path):
+        st.error("⚠️ Model file not found! Please check the path.")
+        st.stop()
+    return model_path
+
+
+@st.cache_resource(show_spinner="Loading model...")
+def _attach_registry(root, num_threads, check_interval):
+    with timed("attach model registry"):
+        registry = ModelRegistry(root, num_threads, check_interval)
+        registry.backend()
+    return registry
+
+
+def get_registry():
+    """Returns the registry attachment, stopping the page if nothing has been published yet."""
+    if current_version(MODEL_REGISTRY_DIR) is None:
+        st.error("⚠️ No model published! Run `python -m cognitex.model_registry publish MODEL`.")
+        st.stop()
+    return _attach_registry(MODEL_REGISTRY_DIR, INFERENCE_THREADS, MODEL_REGISTRY_CHECK_SECONDS)
+
+
+def get_backend():
+    """Returns the shared inference backend (the hot-reloading registry when MODEL_REGISTRY_DIR is set)."""
+    if MODEL_REGISTRY_DIR:
+        return get_registry()
+    model_path = _model_path()
+    return _load_backend(INFERENCE_ENGINE, model_path, INFERENCE_THREADS, model_version(model_path, INFERENCE_ENGINE))
+
+
+# ✅ Micro-batching (merges concurrent sessions' scans into one model call)
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load_batcher(engine, model_path, num_threads, version, max_batch_size, max_wait_ms):
+    backend = _load_backend(engine, model_path, num_threads, version)
+    return MicroBatcher(backend, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+
+@st.cache_resource(show_spinner=False)
+def _load_registry_batcher(root, num_threads, check_interval, max_batch_size, max_wait_ms):
+    registry = _attach_registry(root, num_threads, check_interval)
+    return MicroBatcher(registry, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+
+def get_batcher():
+    """Returns the shared in-process micro-batcher."""
+    if MODEL_REGISTRY_DIR:
+        get_registry()
+        return _load_registry_batcher(MODEL_REGISTRY_DIR, INFERENCE_THREADS, MODEL_REGISTRY_CHECK_SECONDS,
+                                      INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS)
+    model_path = _model_path()
+    return _load_batcher(INFERENCE_ENGINE, model_path, INFERENCE_THREADS, model_version(model_path, INFERENCE_ENGINE),
+                         INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS)
+
+
+@st.cache_resource(show_spinner=False)
+def get_inference_client(url):
+    return InferenceClient(url)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _server_model_version(url):
+    return get_inference_client(url).model_version()
+
+
+# ✅ Prediction Cache (repeat uploads of the same scan skip inference)
+@st.cache_resource(show_spinner=False)
+def _load_prediction_cache(version):
+    return PredictionCache(PREDICTION_CACHE_PATH, version, max_bytes=PREDICTION_CACHE_MAX_MB * 1024 * 1024)
+
+
+def get_prediction_cache():
+    """Returns the cache for the current model version; a new model file gets a fresh cache."""
+    if INFERENCE_SERVER_URL:
+        return _load_prediction_cache(_server_model_version(INFERENCE_SERVER_URL))
+    if MODEL_REGISTRY_DIR:
+        return _load_prediction_cache(get_registry().version)
+    return _load_prediction_cache(model_version(_model_path(), INFERENCE_ENGINE))
+
+# ✅ Tabular Model (clinical variables instead of an MRI scan)
+@st.cache_resource(show_spinner="Loading clinical model...")
+def _load_tabular_model(path, mtime):
+    with timed("load tabular model"):
+        return TabularModel.load(path)
+
+
+def get_tabular_model():
+    """Returns the fitted tabular model, stopping the page if it hasn't been trained."""
+    if not os.path.exists(TABULAR_MODEL_PATH):
+        st.error("⚠️ Clinical model not found! Train it with `python -m cognitex.tabular train`.")
+        st.stop()
+    return _load_tabular_model(TABULAR_MODEL_PATH, os.path.getmtime(TABULAR_MODEL_PATH))
+
+
+def _choices(categories):
+    """Turns one-hot column names such as 'APOE Genotype_3,4' back into the raw values."""
+    return [category.split("_", 1)[1] for category in categories]
 
 # ✅ Validation Functions
 def validate_phone_number(phone_number):
@@ -55,110 +188,214 @@ def validate_input(name, age, contact, file):
         return False
     return True
 
-# ✅ Image Processing
-def preprocess_image(image):
-    """Resizes and normalizes MRI image for model prediction."""
-    image = image.convert('RGB').resize((176, 176))
-    image = np.array(image) / 255.0
-    return np.expand_dims(image, axis=0)
-
 # ✅ Model Prediction
 def predict_alzheimer(image):
-    """Predicts Alzheimer's stage based on the MRI scan."""
-    prediction = model.predict(image)
-    return np.argmax(prediction, axis=1)[0]
+    """Predicts Alzheimer's stage based on the MRI scan, returning (class_index, probabilities)."""
+    if INFERENCE_MICROBATCH:
+        probabilities = get_batcher().predict(image[0])
+    else:
+        probabilities = get_backend().predict(image)[0]
+    return int(np.argmax(probabilities)), probabilities
+
+
+def score_scan(scan_bytes):
+    """Preprocesses and predicts an uploaded scan, reusing the result for identical uploads."""
+    def compute():
+        if INFERENCE_SERVER_URL:
+            with trace("inference"):
+                return get_inference_client(INFERENCE_SERVER_URL).predict(scan_bytes)
+        with trace("upload_decode"):
+            image = open_scan(scan_bytes)
+        with image:
+            with trace("preprocess"):
+                batch = preprocess_image(image)
+        with trace("inference"):
+            return predict_alzheimer(batch)
 
+    predicted_condition, _ = get_prediction_cache().get_or_compute(scan_bytes, compute)
+    return predicted_condition
 
 
-# ✅ Insert Data into MySQL
-def insert_data(patient_name, age, gender, mobile_no, prediction):
-    """Stores patient details and MRI scan in MySQL database."""
+def score_volume_upload(scan_bytes, filename):
+    """Scores an uploaded NIfTI volume or zipped DICOM series, returning (class_index, VolumePrediction or None).
+
+    The upload is spooled to a temporary file so the volume can be memory-mapped
+    instead of decoded whole; repeat uploads are answered from the prediction cache.
+    """
+    result = {}
+
+    def compute():
+        suffix = ".nii.gz" if filename.lower().endswith(".nii.gz") else os.path.splitext(filename)[1].lower()
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "volume" + suffix)
+            with open(path, "wb") as f:
+                f.write(scan_bytes)
+            with trace("volume_inference"):
+                prediction = score_volume(path, get_backend())
+        result["prediction"] = prediction
+        return prediction.class_index, prediction.probabilities
+
+    predicted_condition, _ = get_prediction_cache().get_or_compute(scan_bytes, compute)
+    return predicted_condition, result.get("prediction")
+
+
+
+# ✅ Keep the Scan (stored once per unique file, the database only gets its hash)
+def store_scan(scan_bytes):
+    """Saves the scan to the image store; returns its ScanInfo, or None if it could not be written."""
     try:
-        sql = "INSERT INTO predicts (name, age, gender, contact, diagnosis_condition) VALUES (%s, %s, %s, %s, %s)"
-        val = (patient_name, age, gender, mobile_no, prediction)
-        mycursor.execute(sql, val)
-        mydb.commit()
+        with trace("image_store"):
+            return get_image_store().put(scan_bytes)
+    except (OSError, ScanRejected) as err:
+        print("⚠️ Could not store scan:", err)
+        return None
+
+
+# ✅ Insert Data into the Database
+def insert_data(patient_name, age, gender, mobile_no, prediction, scan=None, source="mri"):
+    """Queues patient details for the background writer, writing directly if the queue is full."""
+    val = (patient_name, age, gender, mobile_no, prediction, source, scan, get_prediction_cache().version)
+    with trace("db_enqueue"):
+        queued = get_writer().submit(val)
+    if queued:
+        return
+    try:
+        with trace("db_insert"):
+            add_visit(get_db(), *val)
         print("✅ Record inserted successfully!")
-    except mysql.connector.Error as err:
+    except DatabaseError as err:
         print("❌ Error inserting record:", err)
 
 # ✅ Generate PDF Report
 def generate_pdf(patient_name, age, gender, mobile_no, condition):
-    """Creates a downloadable PDF report for the patient."""
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(200, 10, "Alzheimer's Disease Prediction Report", ln=True, align="C")
-    pdf.ln(10)
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, f"Patient Name: {patient_name}", ln=True)
-    pdf.cell(200, 10, f"Age: {age}", ln=True)
-    pdf.cell(200, 10, f"Gender: {gender}", ln=True)
-    pdf.cell(200, 10, f"Contact: {mobile_no}", ln=True)
-    pdf.ln(10)
-
-    pdf.set_font("Arial", "B", 14)
-    pdf.cell(200, 10, "Diagnosis:", ln=True)
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, f"Predicted Condition: {condition}", ln=True)
-    pdf.ln(10)
-
-    if condition != "No Dementia":
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(200, 10, "Precautions:", ln=True)
-        pdf.set_font("Arial", size=12)
-        precautions = [
-            "Maintain a daily routine.",
-            "Stay physically and mentally active.",
-            "Follow a healthy diet.",
-            "Engage in social interactions.",
-            "Reduce stress and anxiety.",
-            "Get enough sleep every night.",
-            "Stay hydrated and avoid alcohol.",
-            "Take prescribed medications on time."
-        ]
-        for precaution in precautions:
-            pdf.multi_cell(0, 8, f"- {precaution}")
-        pdf.ln(10)
-    else:
-        pdf.cell(200, 10, "🎉 Congratulations! No Dementia Detected.", ln=True)
-
-    
-
-    pdf_file_path = "Alzheimer_Report.pdf"
-    pdf.output(pdf_file_path)
-
-    with open(pdf_file_path, "rb") as f:
-        return f.read()
+    """Creates a downloadable PDF report for the patient, rendered in memory."""
+    with trace("pdf_render"):
+        return render_report(patient_name, age, gender, mobile_no, condition)
 
 # ✅ Streamlit UI
 def prediction_page():
     """Main UI for Alzheimer's Prediction System."""
     st.title("🧠 Alzheimer's Prediction System")
-    patient_name = st.text_input("Patient Name")
-    age = st.number_input("Age", min_value=0, max_value=122, step=1, value=65)
-    gender = st.selectbox("Gender", ("Male", "Female"))
-    mobile_no = st.text_input("Mobile Number")
-    mri_scan = st.file_uploader("Upload MRI Scan (JPG/PNG)", type=["jpg", "jpeg", "png"])
+    mode = st.radio("Predict from", ("MRI Scan", "Clinical Variables", "Patient Registry (CSV)"), horizontal=True)
+    if mode == "MRI Scan":
+        mri_prediction()
+    elif mode == "Clinical Variables":
+        clinical_prediction()
+    else:
+        registry_screening()
+
+
+@fragment
+def mri_prediction():
+    """Scores one uploaded MRI scan, saves the patient and offers the PDF report.
 
-    if st.button("Submit & Predict"):
+    The inputs are a form, so filling them in does not rerun the script; only the submit does.
+    """
+    with st.form("mri_prediction"):
+        patient_name = st.text_input("Patient Name")
+        age = st.number_input("Age", min_value=0, max_value=122, step=1, value=65)
+        gender = st.selectbox("Gender", ("Male", "Female"))
+        mobile_no = st.text_input("Mobile Number")
+        mri_scan = st.file_uploader("Upload MRI Scan (JPG/PNG, NIfTI .nii/.nii.gz or a zipped DICOM series)",
+                                    type=["jpg", "jpeg", "png", "nii", "gz", "zip"])
+        submitted = st.form_submit_button("Submit & Predict")
+
+    if submitted:
+        st.session_state.pop("mri_result", None)  # a new submission replaces the previous result
         if validate_name(patient_name) and validate_phone_number(mobile_no) and validate_input(patient_name, age, mobile_no, mri_scan):
-            image = Image.open(mri_scan)
-            preprocessed_image = preprocess_image(image)
-            predicted_condition = predict_alzheimer(preprocessed_image)
+            volume = is_volume(mri_scan.name)
+            try:
+                with trace("predict_scan"):
+                    if volume:
+                        with st.spinner("Reading volume slices..."):
+                            predicted_condition, details = score_volume_upload(mri_scan.getvalue(), mri_scan.name)
+                    else:
+                        predicted_condition = score_scan(mri_scan.getvalue())
+            except ScanRejected as err:
+                st.error(f"⚠️ {err}")
+                return
+            except ImportError as err:
+                st.error(f"⚠️ Volume support is not installed ({err.name}). Run `pip install nibabel pydicom`.")
+                return
+            condition = condition_label(predicted_condition)
+
+            # ✅ Save Patient Data in Database & start the PDF Report in the background (kept in the session)
+            if volume:
+                insert_data(patient_name, age, gender, mobile_no, condition, source="volume")
+            else:
+                insert_data(patient_name, age, gender, mobile_no, condition, store_scan(mri_scan.getvalue()))
+            report = get_report_pool().submit(generate_pdf, patient_name, age, gender, mobile_no, condition)
+            caption = (f"Combined from {details.slices} axial slices, {details.agreement:.0%} of which agree."
+                       if volume and details is not None else None)
+            st.session_state["mri_result"] = {"condition": condition, "caption": caption, "report": report}
+
+    show_mri_result()
+
+
+def show_mri_result():
+    """Shows the session's latest prediction; the PDF is offered once the background render has finished."""
+    result = st.session_state.get("mri_result")
+    if result is None:
+        return
+    st.success(f"✅ Prediction Complete! Patient Condition: **{result['condition']}**")
+    if result["caption"]:
+        st.caption(result["caption"])
+
+    # ✅ Download PDF Report (never waited for in the run that made the prediction)
+    report = result["report"]
+    if report.done():
+        st.download_button("📄 Download Report", report.result(), "Alzheimer_Report.pdf", "application/pdf")
+    elif st.button("📄 Get Report"):
+        with st.spinner("Preparing report..."):
+            pdf_bytes = report.result()
+        st.download_button("📄 Download Report", pdf_bytes, "Alzheimer_Report.pdf", "application/pdf")
+
 
-            CONDITION_LABELS = {0: "Mild Dementia", 1: "Moderate Dementia", 2: "No Dementia", 3: "Very Mild Dementia"}
-            condition = CONDITION_LABELS.get(predicted_condition, "Unknown Condition")
+@fragment
+def clinical_prediction():
+    """Predicts the diagnosis group (AD / LMCI / CN) from one patient's clinical variables."""
+    with st.form("clinical_prediction"):
+        col1, col2 = st.columns(2)
+        with col1:
+            age = st.number_input("Age", min_value=40.0, max_value=100.0, step=0.1, value=70.0)
+            gender = st.selectbox("Gender", ("Male", "Female"))
+            education = st.number_input("Years of Education", min_value=0, max_value=30, step=1, value=16)
+            ethnicity = st.selectbox("Ethnicity", _choices(PTHETHCAT_CATEGORIES), index=1)
+        with col2:
+            race = st.selectbox("Race", _choices(PTRACCAT_CATEGORIES), index=2)
+            genotype = st.selectbox("APOE Genotype", _choices(APOE_CATEGORIES), index=3)
+            mmse = st.number_input("MMSE Score", min_value=0, max_value=30, step=1, value=28)
+        submitted = st.form_submit_button("Predict")
 
-            # ✅ Save Patient Data in Database
-            insert_data(patient_name, age, gender, mobile_no, condition)
+    if submitted:
+        record = {"AGE": age, "PTGENDER": gender, "PTEDUCAT": education, "PTETHCAT": ethnicity,
+                  "PTRACCAT": race, "MMSE": mmse, "APOE Genotype": genotype,
+                  "APOE4": genotype.count("4"), "imputed_genotype": False}
+        model = get_tabular_model()
+        probabilities = model.predict_proba([record])[0]
+        code = str(model.classes[np.argmax(probabilities)])
+        st.success(f"✅ Prediction Complete! Diagnosis group: **{ABBREVIATION.get(code, code)}**")
+        st.write(CONDITION_DESCRIPTION.get(code, ""))
+        st.bar_chart({"Probability": dict(zip(map(str, model.classes), probabilities))})
+        if model.version:
+            st.caption(f"Model {model.metadata['candidate']} {model.version}")
 
-            # ✅ Show Prediction Result
-            st.success(f"✅ Prediction Complete! Patient Condition: **{condition}**")
 
-            # ✅ Generate & Download PDF Report
-            pdf_bytes = generate_pdf(patient_name, age, gender, mobile_no, condition)
-            st.download_button("📄 Download Report", pdf_bytes, "Alzheimer_Report.pdf", "application/pdf")
+def registry_screening():
+    """Scores every record of an uploaded registry csv in one vectorized call."""
+    st.caption("Columns: AGE, PTGENDER, PTEDUCAT, PTETHCAT, PTRACCAT, MMSE, APOE4, imputed_genotype, APOE Genotype")
+    registry = st.file_uploader("Upload Patient Registry (CSV)", type=["csv"])
+    if registry is not None and st.button("Screen Registry"):
+        frame = pd.read_csv(registry)
+        try:
+            frame["prediction"] = get_tabular_model().predict(frame)
+        except ValueError as err:
+            st.error(f"⚠️ {err}")
+            return
+        st.success(f"✅ Screened {len(frame)} patient(s).")
+        st.dataframe(frame["prediction"].value_counts())
+        st.download_button("📄 Download Predictions", frame.to_csv(index=False).encode("utf-8"),
+                           "registry_predictions.csv", "text/csv")
 
 # ✅ Run Streamlit App
 if __name__ == "__main__":
@@ -0,0 +1,24 @@
+import csv
+
+from cognitex.batch_predict import MANIFEST_COLUMNS, insert_results, read_manifest
+from cognitex.db import connect
+
+
+def test_bad_ages_are_skipped_without_aborting_the_insert(tmp_path, capsys):
+    manifest = tmp_path / "manifest.csv"
+    with open(manifest, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(MANIFEST_COLUMNS)
+        writer.writerows([("a.png", "Ann Lee", "65.0", "Female", "111"),
+                          ("b.png", "Bob Ray", "", "Male", "222"),
+                          ("c.png", "Cy Doe", "sixty", "Male", "333"),
+                          ("d.png", "Di Poe", "70", "Female", "444")])
+    records = read_manifest(manifest)
+    assert [r["age"] for r in records] == ["65", "", "sixty", "70"]
+
+    results = [dict(r, class_index=2, condition="No Dementia", confidence="0.9", error="") for r in records]
+    db = connect(f"sqlite:///{tmp_path / 'batch.db'}")
+    assert insert_results(db, results) == 2
+    assert db.fetchall("SELECT name, age FROM predicts ORDER BY id") == [("Ann Lee", 65), ("Di Poe", 70)]
+    assert "Skipped b.png" in capsys.readouterr().out
+    db.close()
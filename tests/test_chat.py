@@ -0,0 +1,56 @@
+import pytest
+
+from cognitex.chat import ChatError, _HuggingChatConversation
+
+
+class _Bot:
+    def __init__(self, chunks, fail_at=None):
+        self.chunks = chunks
+        self.fail_at = fail_at
+        self.prompts = []
+
+    def chat(self, prompt):
+        self.prompts.append(prompt)
+        return self._message()
+
+    def _message(self):  # lazy, like hugchat's Message
+        for i, chunk in enumerate(self.chunks):
+            if i == self.fail_at:
+                raise ConnectionError("cookies expired")
+            yield {"type": "stream", "token": chunk}
+
+
+class _Provider:
+    def __init__(self, *bots):
+        self.bots = list(bots)
+        self.refreshes = []
+
+    def new_chatbot(self, refresh=False):
+        self.refreshes.append(refresh)
+        return self.bots.pop(0)
+
+
+def test_logs_in_again_when_the_first_chunk_fails():
+    retry = _Bot(["Hi", " there"])
+    provider = _Provider(_Bot(["Hi"], fail_at=0), retry)
+    conversation = _HuggingChatConversation(provider)
+
+    assert "".join(conversation.stream("hello", context="ctx: ")) == "Hi there"
+    assert provider.refreshes == [False, True]
+    assert retry.prompts == ["ctx: hello"]  # the new conversation gets the context again
+
+
+def test_failure_mid_stream_is_a_chat_error():
+    provider = _Provider(_Bot(["Hi", " there"], fail_at=1), _Bot(["Again"]))
+    conversation = _HuggingChatConversation(provider)
+    stream = conversation.stream("hello")
+    assert next(stream) == "Hi"
+    with pytest.raises(ChatError):
+        next(stream)
+    assert "".join(conversation.stream("hello")) == "Again"  # the next prompt starts a new conversation
+
+
+def test_failed_retry_is_a_chat_error():
+    provider = _Provider(_Bot(["Hi"], fail_at=0), _Bot(["Hi"], fail_at=0))
+    with pytest.raises(ChatError):
+        list(_HuggingChatConversation(provider).stream("hello"))
@@ -0,0 +1,104 @@
+import csv
+import json
+
+import pytest
+
+from cognitex.db import connect
+from cognitex.export import COLUMNS, export_predictions, main
+
+
+def _add_visits(db, count, start_day=1):
+    with db.cursor() as cur:
+        for day in range(start_day, start_day + count):
+            cur.execute(db.sql("INSERT INTO visits (patient_id, age, diagnosis_condition, created_at, image_hash) "
+                               "VALUES (%s, %s, %s, %s, %s)"),
+                        (1, 60 + day, "No Dementia", f"2026-10-{day:02d} 09:00:00", f"{day:064d}"))
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = connect(f"sqlite:///{tmp_path / 'export.db'}")
+    with db.cursor() as cur:
+        cur.execute(db.sql("INSERT INTO patients (name, search_name, gender, contact) VALUES (%s, %s, %s, %s)"),
+                    ("Ann Lee", "ann lee", "Female", "111"))
+        cur.execute(db.sql("INSERT INTO scans (hash, format, width, height, bytes) VALUES (%s, %s, %s, %s, %s)"),
+                    (f"{1:064d}", "JPEG", 176, 208, 1000))
+    _add_visits(db, 5)
+    yield db
+    db.close()
+
+
+def _csv_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_csv_export_reads_every_page(db, tmp_path):
+    path = tmp_path / "predicts.csv"
+    pages = []
+    result = export_predictions(db, str(path), chunk_size=2, progress=lambda rows, last_id: pages.append(last_id))
+
+    rows = _csv_rows(path)
+    assert rows[0] == list(COLUMNS)
+    assert [int(row[0]) for row in rows[1:]] == [1, 2, 3, 4, 5]
+    assert pages == [2, 4, 5]
+    assert (result.rows, result.last_id) == (5, 5)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_since_id_and_since_timestamp(db, tmp_path):
+    result = export_predictions(db, str(tmp_path / "after_id.csv"), since_id=3, chunk_size=2)
+    assert [int(row[0]) for row in _csv_rows(result.path)[1:]] == [4, 5]
+
+    result = export_predictions(db, str(tmp_path / "since.csv"), since="2026-10-02 00:00:00", chunk_size=2)
+    assert [int(row[0]) for row in _csv_rows(result.path)[1:]] == [2, 3, 4, 5]
+    assert result.last_id == 5
+
+    result = export_predictions(db, str(tmp_path / "none.csv"), since="2026-11-01 00:00:00")
+    assert (result.rows, result.last_id) == (0, 5)  # the next export continues after the newest visit
+    assert len(_csv_rows(result.path)) == 1
+
+
+def test_parquet_export_has_a_fixed_schema_and_one_row_group_per_page(db, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "predicts.parquet"
+    result = export_predictions(db, str(path), with_images=True, chunk_size=2)
+
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_row_groups == 3
+    schema = parquet.schema_arrow
+    assert schema.field("id").type == pa.int64()
+    assert schema.field("age").type == pa.int32()
+    assert pa.types.is_timestamp(schema.field("created_at").type)  # Parquet stores second precision as ms
+    assert schema.field("image_width").type == pa.int32()
+    table = parquet.read()
+    assert table.column("id").to_pylist() == [1, 2, 3, 4, 5]
+    assert table.column("image_format").to_pylist() == ["JPEG", None, None, None, None]
+    assert str(table.column("created_at")[0].as_py()) == "2026-10-01 09:00:00"
+    assert result.rows == 5
+
+
+def test_state_file_continues_the_last_export(db, tmp_path, capsys):
+    state = tmp_path / "state" / "predicts.state.json"
+    first = tmp_path / "first.csv"
+    assert main([str(first), "--db", f"sqlite:///{tmp_path / 'export.db'}", "--state", str(state)]) == 0
+    assert json.loads(state.read_text())["last_id"] == 5
+
+    _add_visits(db, 2, start_day=6)
+    second = tmp_path / "second.csv"
+    assert main([str(second), "--db", f"sqlite:///{tmp_path / 'export.db'}", "--state", str(state)]) == 0
+    assert [int(row[0]) for row in _csv_rows(second)[1:]] == [6, 7]
+    assert json.loads(state.read_text())["last_id"] == 7
+    assert "--since-id 7" in capsys.readouterr().out
+
+
+def test_recent_visits_wait_for_the_committed_watermark(db, tmp_path):
+    with db.cursor() as cur:  # created now, so possibly behind a lower id still in flight
+        cur.execute(db.sql("INSERT INTO visits (patient_id, age, diagnosis_condition) VALUES (%s, %s, %s)"),
+                    (1, 80, "Mild Dementia"))
+    result = export_predictions(db, str(tmp_path / "settled.csv"), since_id=3)
+    assert (result.rows, result.last_id) == (2, 5)
+
+    result = export_predictions(db, str(tmp_path / "rest.csv"), since_id=result.last_id, settle_seconds=0)
+    assert [int(row[0]) for row in _csv_rows(result.path)[1:]] == [6]
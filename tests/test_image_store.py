@@ -0,0 +1,37 @@
+import io
+import sqlite3
+
+import numpy as np
+from PIL import Image
+
+import cognitex.image_store as image_store
+from cognitex.db import connect
+from cognitex.image_store import ImageStore, import_legacy
+from tests.test_db import CREATE_DB_SQL
+
+
+def _png(seed):
+    pixels = np.random.default_rng(seed).integers(0, 255, (32, 32), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, "L").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_import_legacy_links_blobs_page_by_page(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.execute(CREATE_DB_SQL)
+    conn.executemany("INSERT INTO predicts (name, age, gender, contact, diagnosis_condition, image) "
+                     "VALUES (?, ?, ?, ?, ?, ?)",
+                     [(f"Patient {i}", 60 + i, "Female", str(i), "No Dementia", _png(i)) for i in range(5)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(image_store, "LEGACY_PAGE_SIZE", 2)
+
+    db = connect(f"sqlite:///{path}")
+    store = ImageStore(str(tmp_path / "store"))
+    assert import_legacy(db, store) == (5, 0)
+    hashes = [row[0] for row in db.fetchall("SELECT image_hash FROM visits ORDER BY id")]
+    assert all(hashes) and len(set(hashes)) == 5
+    assert store.path(hashes[0]) is not None
+    db.close()
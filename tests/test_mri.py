@@ -0,0 +1,30 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from cognitex.mri import IMAGE_SIZE, ScanRejected, open_scan, preprocess_image
+
+
+def _png(mode):
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 255, (300, 300, 4), dtype=np.uint8), "RGBA")
+    buffer = io.BytesIO()
+    (image if mode == "RGBA" else image.convert("RGB" if mode == "P" else mode).convert(mode)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("mode", ["P", "RGBA", "LA"])
+def test_converted_scan_is_preprocessed(mode):
+    batch = preprocess_image(open_scan(_png(mode)))
+    assert batch.shape == (1,) + IMAGE_SIZE + (3,)
+    assert 0.0 <= batch.min() and batch.max() <= 1.0
+
+
+@pytest.mark.parametrize("mode", ["P", "RGBA", "LA"])
+def test_truncated_png_is_rejected(mode):
+    data = _png(mode)
+    scan = open_scan(data[:len(data) // 2])  # the header is intact, the pixel data is not
+    with pytest.raises(ScanRejected):
+        preprocess_image(scan)
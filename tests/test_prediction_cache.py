@@ -0,0 +1,45 @@
+import numpy as np
+
+from cognitex.prediction_cache import PredictionCache
+
+PROBABILITIES = np.array([0.1, 0.2, 0.3, 0.4], dtype=np.float32)
+
+
+def test_other_versions_survive_a_new_process(tmp_path):
+    path = str(tmp_path / "cache.db")
+    old = PredictionCache(path, "v1")
+    old.put(b"scan", 3, PROBABILITIES)
+    new = PredictionCache(path, "v2")  # e.g. another process that already hot-reloaded
+    new.put(b"scan", 1, PROBABILITIES)
+
+    assert old.get(b"scan")[0] == 3
+    assert PredictionCache(path, "v1").get(b"scan")[0] == 3
+    assert new.get(b"scan")[0] == 1
+
+
+def test_eviction_counts_rows_written_by_other_processes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    row_size = 64 + PROBABILITIES.nbytes
+    first = PredictionCache(path, "v1", max_bytes=10 * row_size)
+    second = PredictionCache(path, "v2", max_bytes=10 * row_size)
+    for i in range(8):
+        first.put(b"first %d" % i, 0, PROBABILITIES)
+    for i in range(8):
+        second.put(b"second %d" % i, 0, PROBABILITIES)
+
+    total = second._db.execute("SELECT SUM(size) FROM prediction_cache").fetchone()[0]
+    assert total == first.size() == second.size()
+    assert total <= 10 * row_size
+    assert first.get(b"first 0") is not None  # still in first's memory layer
+    assert PredictionCache(path, "v1").get(b"first 0") is None  # the oldest rows were evicted
+    assert second.get(b"second 7") is not None
+
+
+def test_size_is_initialized_for_an_existing_cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = PredictionCache(path, "v1")
+    cache.put(b"scan", 0, PROBABILITIES)
+    cache.put(b"scan", 1, PROBABILITIES)  # replacing a row does not count it twice
+    cache._db.execute("DROP TABLE prediction_cache_size")  # as in a cache file from before the size table
+    cache._db.commit()
+    assert PredictionCache(path, "v1").size() == 64 + PROBABILITIES.nbytes
@@ -0,0 +1,69 @@
+import os
+
+import pandas as pd
+import pytest
+
+from cognitex.stream_score import _Checkpoint, stream_score
+from cognitex.tabular import DATA_PATH, train
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("sklearn")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("model") / "tabular.joblib")
+    train(os.path.join(ROOT, DATA_PATH), path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def registry(tmp_path_factory):
+    frame = pd.read_csv(os.path.join(ROOT, DATA_PATH))
+    path = str(tmp_path_factory.mktemp("input") / "registry.csv")
+    frame.to_csv(path, index=False)
+    return path, len(frame)
+
+
+def test_csv_to_csv(tmp_path, model_path, registry):
+    path, rows = registry
+    output = str(tmp_path / "scored.csv")
+    summary = stream_score(path, output, model_path, chunk_size=100, workers=1, log_every=0)
+    scored = pd.read_csv(output)
+    assert summary["rows"] == len(scored) == rows
+    assert scored["prediction"].notna().all()
+
+
+def test_parquet_directory_round_trip(tmp_path, model_path, registry):
+    path, rows = registry
+    parts = str(tmp_path / "scored.parquet")
+    stream_score(path, parts, model_path, chunk_size=100, workers=1, log_every=0)
+    assert len([name for name in os.listdir(parts) if name.startswith("part-")]) > 1
+
+    # The directory of parts is valid input, read back as one dataset with one schema
+    again = str(tmp_path / "again.csv")
+    summary = stream_score(parts, again, model_path, chunk_size=250, workers=1, log_every=0)
+    assert summary["rows"] == rows
+    assert list(pd.read_csv(again)["prediction"]) == list(pd.read_parquet(parts)["prediction"])
+
+
+def test_resumed_parquet_parts_keep_one_schema(tmp_path, model_path, registry):
+    import pyarrow.dataset as ds
+
+    path, rows = registry
+    parts = str(tmp_path / "scored.parquet")
+    stream_score(path, parts, model_path, chunk_size=100, workers=1, log_every=0)
+    for name in sorted(os.listdir(parts))[3:]:
+        os.remove(os.path.join(parts, name))
+    # As if stopped after the third chunk
+    checkpoint = _Checkpoint(parts, {"input": os.path.abspath(path), "chunk_size": 100,
+                                     "model": os.path.abspath(model_path),
+                                     "model_mtime": os.path.getmtime(model_path)})
+    checkpoint.chunks, checkpoint.rows = 3, 300
+    checkpoint.save()
+
+    summary = stream_score(path, parts, model_path, chunk_size=100, workers=1, resume=True, log_every=0)
+    assert summary["rows"] == rows
+    assert ds.dataset(parts, format="parquet").to_table().num_rows == rows
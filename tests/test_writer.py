@@ -0,0 +1,76 @@
+import sqlite3
+
+from cognitex.db import DatabaseError, connect
+from cognitex.history import record_visit
+from cognitex.writer import PredictionWriter
+
+
+def _writer(tmp_path, write_row=record_visit):
+    db = connect(f"sqlite:///{tmp_path / 'visits.db'}")
+    return db, PredictionWriter(db, write_row, flush_interval=0.01, retry_delay=0)
+
+
+def _row(contact, age=70):
+    return ("Ann Lee", age, "Female", contact, "No Dementia")
+
+
+def _visits(db):
+    return db.fetchone("SELECT COUNT(*) FROM visits")[0]
+
+
+def test_writes_queued_rows(tmp_path):
+    db, writer = _writer(tmp_path)
+    for contact in ("111", "222", "111"):
+        assert writer.submit(_row(contact))
+    writer.flush()
+    assert (writer.written, writer.failed, _visits(db)) == (3, 0, 3)
+    writer.close()
+    db.close()
+
+
+def test_bad_row_is_rejected_and_the_rest_of_the_batch_is_written(tmp_path):
+    db, writer = _writer(tmp_path)
+    writer.submit(_row("111"))
+    writer.submit(_row("222", age="not a number"))
+    writer.submit(_row("333"))
+    writer.flush()
+    assert (writer.written, writer.failed, _visits(db)) == (2, 1, 2)
+    writer.close()
+    db.close()
+
+
+def test_unexpected_error_drops_the_batch_but_not_the_thread(tmp_path):
+    def write_row(db, cursor, *row):
+        if row[3] == "boom":
+            raise RuntimeError("unexpected")
+        record_visit(db, cursor, *row)
+
+    db, writer = _writer(tmp_path, write_row)
+    writer.submit(_row("boom"))
+    writer.flush()
+    assert writer.failed == 1
+    assert writer._thread.is_alive()
+
+    writer.submit(_row("111"))
+    writer.flush()
+    assert (writer.written, _visits(db)) == (1, 1)
+    writer.close()
+    db.close()
+
+
+def test_retried_batch_counts_rejected_rows_once(tmp_path):
+    attempts = []
+
+    def write_row(db, cursor, *row):
+        if row[3] == "dup":
+            raise sqlite3.IntegrityError("rejected")
+        if row[3] == "flaky" and len(attempts) < 1:
+            attempts.append(1)
+            raise DatabaseError("connection lost")
+        record_visit(db, cursor, *row)
+
+    db, writer = _writer(tmp_path, write_row)
+    writer._write_with_retries([_row("dup"), _row("flaky")])  # one batch: the first attempt rolls back
+    assert (writer.written, writer.failed, _visits(db)) == (1, 1, 1)
+    writer.close()
+    db.close()